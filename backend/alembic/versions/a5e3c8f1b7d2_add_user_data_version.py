@@ -0,0 +1,30 @@
+"""add user data version for conditional GET
+
+Revision ID: a5e3c8f1b7d2
+Revises: f2c9a6e1d8b4
+Create Date: 2026-10-19 14:37:09.381526
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5e3c8f1b7d2'
+down_revision: Union[str, Sequence[str], None] = 'f2c9a6e1d8b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user', sa.Column('data_updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'data_updated_at')
+    op.drop_column('user', 'data_version')
@@ -0,0 +1,30 @@
+"""add indexes for period PnL aggregation
+
+Revision ID: b3d1f7a2c4e9
+Revises: 9a8b7c6d5e4f
+Create Date: 2026-10-19 09:12:41.530817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d1f7a2c4e9'
+down_revision: Union[str, Sequence[str], None] = '9a8b7c6d5e4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_webhook_trades_user_timestamp', 'webhook_trades', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_webhook_positions_user_closed_at', 'webhook_positions', ['user_id', 'closed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webhook_positions_user_closed_at', table_name='webhook_positions')
+    op.drop_index('ix_webhook_trades_user_timestamp', table_name='webhook_trades')
@@ -0,0 +1,47 @@
+"""add pnl_daily rollup table
+
+Revision ID: c7e2a9d4f1b6
+Revises: b3d1f7a2c4e9
+Create Date: 2026-10-19 10:03:17.226405
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2a9d4f1b6'
+down_revision: Union[str, Sequence[str], None] = 'b3d1f7a2c4e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('pnl_daily',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('asset_name', sa.String(length=20), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('realized_pnl', sa.Float(), nullable=True),
+    sa.Column('fees', sa.Float(), nullable=True),
+    sa.Column('volume', sa.Float(), nullable=True),
+    sa.Column('trade_count', sa.Integer(), nullable=True),
+    sa.Column('winning_trades', sa.Integer(), nullable=True),
+    sa.Column('losing_trades', sa.Integer(), nullable=True),
+    sa.Column('last_updated', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'asset_name', 'day', name='uq_pnl_daily_user_asset_day')
+    )
+    op.create_index(op.f('ix_pnl_daily_id'), 'pnl_daily', ['id'], unique=False)
+    op.create_index('ix_pnl_daily_user_day', 'pnl_daily', ['user_id', 'day'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pnl_daily_user_day', table_name='pnl_daily')
+    op.drop_index(op.f('ix_pnl_daily_id'), table_name='pnl_daily')
+    op.drop_table('pnl_daily')
@@ -0,0 +1,35 @@
+"""add (timestamp, id) indexes for keyset pagination
+
+Revision ID: d4a8c1e6b2f3
+Revises: c7e2a9d4f1b6
+Create Date: 2026-10-19 11:26:05.918342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8c1e6b2f3'
+down_revision: Union[str, Sequence[str], None] = 'c7e2a9d4f1b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (user_id, timestamp, id) substitui (user_id, timestamp)
+    op.drop_index('ix_webhook_trades_user_timestamp', table_name='webhook_trades')
+    op.create_index('ix_webhook_trades_user_timestamp_id', 'webhook_trades', ['user_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_webhook_trades_user_asset_timestamp_id', 'webhook_trades', ['user_id', 'asset_name', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_webhook_log_config_timestamp_id', 'webhook_log', ['webhook_config_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webhook_log_config_timestamp_id', table_name='webhook_log')
+    op.drop_index('ix_webhook_trades_user_asset_timestamp_id', table_name='webhook_trades')
+    op.drop_index('ix_webhook_trades_user_timestamp_id', table_name='webhook_trades')
+    op.create_index('ix_webhook_trades_user_timestamp', 'webhook_trades', ['user_id', 'timestamp'], unique=False)
@@ -0,0 +1,28 @@
+"""add (opened_at, id) index for asset positions history
+
+Revision ID: e8b5d2f7a3c1
+Revises: d4a8c1e6b2f3
+Create Date: 2026-10-19 12:04:37.214096
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b5d2f7a3c1'
+down_revision: Union[str, Sequence[str], None] = 'd4a8c1e6b2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_webhook_positions_user_asset_opened_at_id', 'webhook_positions', ['user_id', 'asset_name', 'opened_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webhook_positions_user_asset_opened_at_id', table_name='webhook_positions')
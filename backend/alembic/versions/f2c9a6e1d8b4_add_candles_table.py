@@ -0,0 +1,42 @@
+"""add candles table
+
+Revision ID: f2c9a6e1d8b4
+Revises: e8b5d2f7a3c1
+Create Date: 2026-10-19 13:18:52.640173
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c9a6e1d8b4'
+down_revision: Union[str, Sequence[str], None] = 'e8b5d2f7a3c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('candles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('asset_name', sa.String(length=20), nullable=False),
+    sa.Column('interval', sa.String(length=5), nullable=False),
+    sa.Column('open_time', sa.DateTime(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('volume', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('asset_name', 'interval', 'open_time', name='uq_candles_asset_interval_open_time')
+    )
+    op.create_index(op.f('ix_candles_id'), 'candles', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_candles_id'), table_name='candles')
+    op.drop_table('candles')
@@ -1,24 +1,41 @@
+from contextlib import asynccontextmanager
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from config import CORS_CONFIG
+from fastapi.middleware.gzip import GZipMiddleware
+from config import CORS_CONFIG, GZIP_MINIMUM_SIZE, API_THREADPOOL_SIZE
+from application.services.background_jobs import start_background_jobs, stop_background_jobs
 from infrastructure.database import Base, engine
+from infrastructure.http_cache import NotModified, not_modified_handler
+from infrastructure.external.rate_limiter import HyperliquidUnavailable, hyperliquid_unavailable_handler
 from presentation.routes import (
     auth_routes,
     user_routes,
     wallet_routes,
     trading_routes,
     webhook_routes,
-    pnl_routes
+    pnl_routes,
+    ops_routes
 )
 
 # Criar tabelas do banco de dados
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Threadpool das rotas síncronas do mesmo tamanho que o pool do banco (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    # Jobs periódicos (snapshots de conta etc.) rodam no mesmo processo da API
+    start_background_jobs()
+    yield
+    stop_background_jobs()
+
 # Inicializar FastAPI
 app = FastAPI(
     title="HyperHook API",
     version="2.0.0",
-    description="API refatorada com arquitetura limpa para automação de trading na Hyperliquid"
+    description="API refatorada com arquitetura limpa para automação de trading na Hyperliquid",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -27,6 +44,15 @@ app.add_middleware(
     **CORS_CONFIG
 )
 
+# Compressão gzip (o stream SSE fica de fora por padrão)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+# Respostas 304 (ETag/Last-Modified)
+app.add_exception_handler(NotModified, not_modified_handler)
+
+# Chamadas à Hyperliquid recusadas (rate limiter, circuit breaker aberto)
+app.add_exception_handler(HyperliquidUnavailable, hyperliquid_unavailable_handler)
+
 # Registrar rotas
 app.include_router(auth_routes.router)
 app.include_router(user_routes.router)
@@ -34,6 +60,7 @@ app.include_router(wallet_routes.router)
 app.include_router(trading_routes.router)
 app.include_router(webhook_routes.router)
 app.include_router(pnl_routes.router)
+app.include_router(ops_routes.router)
 
 @app.get("/")
 def root():
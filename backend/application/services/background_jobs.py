@@ -0,0 +1,81 @@
+# --- background_jobs.py ---
+from typing import List
+from config import (
+    SNAPSHOT_WORKER_ENABLED, SNAPSHOT_INTERVAL_SECONDS,
+    UNREALIZED_PNL_WORKER_ENABLED, UNREALIZED_PNL_INTERVAL_SECONDS,
+    POSITION_BOOK_ENABLED, POSITION_BOOK_TICK_SECONDS, POSITION_BOOK_FLUSH_SECONDS
+)
+from infrastructure.periodic import PeriodicTask
+from infrastructure.external.rate_limiter import Priority, api_priority
+
+# Tarefas periódicas do processo da API (iniciadas/paradas no lifespan do app)
+background_tasks: List[PeriodicTask] = []
+
+def start_background_jobs():
+    """Cria e inicia as tarefas habilitadas por configuração"""
+    if SNAPSHOT_WORKER_ENABLED:
+        from infrastructure.services.account_snapshots import AccountSnapshotWorker
+        worker = AccountSnapshotWorker()
+        background_tasks.append(
+            PeriodicTask("account-snapshots", SNAPSHOT_INTERVAL_SECONDS, _low_priority(worker.run_once), initial_delay=30)
+        )
+    
+    if UNREALIZED_PNL_WORKER_ENABLED:
+        from infrastructure.services.unrealized_pnl import UnrealizedPnlUpdater
+        updater = UnrealizedPnlUpdater()
+        background_tasks.append(
+            PeriodicTask("unrealized-pnl", UNREALIZED_PNL_INTERVAL_SECONDS, _low_priority(updater.run_once))
+        )
+    
+    if POSITION_BOOK_ENABLED:
+        background_tasks.extend(_position_book_tasks())
+    
+    for task in background_tasks:
+        task.start()
+
+def stop_background_jobs():
+    for task in background_tasks:
+        task.stop()
+    background_tasks.clear()
+
+def _position_book_tasks() -> List[PeriodicTask]:
+    """Carrega o livro de posições e agenda os ticks de preço e a gravação no banco"""
+    from infrastructure.database import SessionLocal
+    from infrastructure.services.position_book import position_book
+    from infrastructure.services.unrealized_pnl import parse_mids
+    from infrastructure.external.hyperliquid_client import HyperliquidClient
+    
+    db = SessionLocal()
+    try:
+        position_book.load(db)
+    finally:
+        db.close()
+    
+    clients = []
+    
+    def tick():
+        if not clients:
+            clients.append(HyperliquidClient())
+        position_book.apply_mids(parse_mids(clients[0].get_all_mids()))
+    
+    def flush():
+        db = SessionLocal()
+        try:
+            position_book.flush(db)
+        finally:
+            db.close()
+    
+    return [
+        PeriodicTask("position-book-ticks", POSITION_BOOK_TICK_SECONDS, _low_priority(tick)),
+        PeriodicTask("position-book-flush", POSITION_BOOK_FLUSH_SECONDS, flush, initial_delay=POSITION_BOOK_FLUSH_SECONDS)
+    ]
+
+def _low_priority(fn):
+    """Jobs usam a parte do orçamento da Hyperliquid que não é reservada para ordens"""
+    def run():
+        with api_priority(Priority.LOW):
+            return fn()
+    return run
+
+def background_jobs_stats() -> List[dict]:
+    return [task.stats() for task in background_tasks]
@@ -1,22 +1,54 @@
 # --- dashboard_service.py ---
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy import and_, func, desc
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 from typing import Dict, List, Optional
 from domain.models import (
     WebhookTrade, WebhookPosition, WebhookPnlSummary, 
-    AccountSnapshot, User, WebhookConfig
+    AccountSnapshot, User, Wallet, WebhookConfig
 )
 from infrastructure.services.pnl_calculator import PnlCalculator
+from infrastructure.services.pnl_rollup import PnlRollup
+from infrastructure.services.candle_store import CandleStore
+from infrastructure.services.account_snapshots import record_account_snapshot
+from infrastructure.pagination import keyset_page
 from infrastructure.external.hyperliquid_client import HyperliquidClient
 
+# Janela padrão (em dias) da curva de PNL por tamanho de bucket
+EQUITY_CURVE_DEFAULT_DAYS = {"hour": 7, "day": 90, "week": 365}
+EQUITY_CURVE_MAX_HOURLY_DAYS = 31
+
+def _downsample_series(series: List[Dict], max_points: int) -> List[Dict]:
+    """
+    Reduz a série agrupando buckets consecutivos: cada grupo vira um ponto com o
+    timestamp e o acumulado do último bucket e a soma do PNL/trades do grupo
+    """
+    if max_points <= 0 or len(series) <= max_points:
+        return series
+    
+    group_size = -(-len(series) // max_points)  # ceil
+    downsampled = []
+    for start in range(0, len(series), group_size):
+        group = series[start:start + group_size]
+        last = group[-1]
+        downsampled.append({
+            "timestamp": last["timestamp"],
+            "pnl": sum(point["pnl"] for point in group),
+            "cumulative_pnl": last["cumulative_pnl"],
+            "trades": sum(point["trades"] for point in group)
+        })
+    return downsampled
+
 class DashboardService:
     def __init__(self, db: Session):
         self.db = db
         self.pnl_calculator = PnlCalculator(db)
     
-    def get_dashboard_summary(self, user_id: int, period: str = "7d") -> Dict:
-        """Obtém resumo completo do dashboard"""
+    def get_dashboard_summary(self, user_id: int, period: str = "7d", assets_pnl: Optional[List[Dict]] = None) -> Dict:
+        """
+        Obtém resumo completo do dashboard
+        `assets_pnl` permite reaproveitar o resultado de get_assets_performance já calculado
+        """
         
         # Snapshot da conta mais recente
         latest_snapshot = self.db.query(AccountSnapshot).filter(
@@ -57,7 +89,8 @@ class DashboardService:
         period_trades = period_pnl_data.get("period_trades", 0)
         
         # Performance por ativo
-        assets_pnl = self.get_assets_performance(user_id)
+        if assets_pnl is None:
+            assets_pnl = self.get_assets_performance(user_id)
         
         # Converter para formato WebhookPnlSummaryResponse
         assets_pnl_formatted = []
@@ -65,6 +98,7 @@ class DashboardService:
             assets_pnl_formatted.append({
                 "id": 0,  # Placeholder
                 "asset_name": asset["asset_name"],
+                "trading_view_symbol": asset["asset_name"],
                 "total_trades": asset["total_trades"],
                 "winning_trades": asset["winning_trades"],
                 "losing_trades": asset["losing_trades"],
@@ -91,21 +125,33 @@ class DashboardService:
     def get_assets_performance(self, user_id: int, period: str = "7d") -> List[Dict]:
         """Obtém performance por ativo"""
         
-        pnl_summaries = self.db.query(WebhookPnlSummary).filter(
+        # Uma posição aberta por ativo (a mais antiga), numa única consulta junto com os resumos
+        open_positions = self.db.query(
+            WebhookPosition,
+            func.row_number().over(
+                partition_by=WebhookPosition.asset_name,
+                order_by=WebhookPosition.id
+            ).label("position_rank")
+        ).filter(
+            and_(
+                WebhookPosition.user_id == user_id,
+                WebhookPosition.is_open == True
+            )
+        ).subquery()
+        open_position = aliased(WebhookPosition, open_positions)
+        
+        rows = self.db.query(WebhookPnlSummary, open_position).outerjoin(
+            open_position,
+            and_(
+                open_position.asset_name == WebhookPnlSummary.asset_name,
+                open_positions.c.position_rank == 1
+            )
+        ).filter(
             WebhookPnlSummary.user_id == user_id
         ).all()
         
         assets_data = []
-        for summary in pnl_summaries:
-            # Posição atual
-            current_position = self.db.query(WebhookPosition).filter(
-                and_(
-                    WebhookPosition.user_id == user_id,
-                    WebhookPosition.asset_name == summary.asset_name,
-                    WebhookPosition.is_open == True
-                )
-            ).first()
-            
+        for summary, current_position in rows:
             assets_data.append({
                 "asset_name": summary.asset_name,
                 "total_trades": summary.total_trades,
@@ -137,36 +183,11 @@ class DashboardService:
         
         return assets_data
     
-    def get_asset_detailed_performance(
-        self, 
-        user_id: int, 
-        asset_name: str,
-        start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> Dict:
-        """Obtém performance detalhada de um ativo específico"""
-        
-        # Filtros de data
-        trade_filters = [WebhookTrade.user_id == user_id, WebhookTrade.asset_name == asset_name]
-        position_filters = [WebhookPosition.user_id == user_id, WebhookPosition.asset_name == asset_name]
-        
-        if start_date:
-            trade_filters.append(WebhookTrade.timestamp >= start_date)
-            position_filters.append(WebhookPosition.opened_at >= start_date)
-        
-        if end_date:
-            trade_filters.append(WebhookTrade.timestamp <= end_date)
-            position_filters.append(WebhookPosition.opened_at <= end_date)
-        
-        # Trades do ativo
-        trades = self.db.query(WebhookTrade).filter(
-            and_(*trade_filters)
-        ).order_by(desc(WebhookTrade.timestamp)).all()
-        
-        # Posições do ativo
-        positions = self.db.query(WebhookPosition).filter(
-            and_(*position_filters)
-        ).order_by(desc(WebhookPosition.opened_at)).all()
+    def get_asset_detailed_performance(self, user_id: int, asset_name: str) -> Dict:
+        """
+        Cabeçalho de tamanho constante de um ativo (resumo + posição atual)
+        Trades, histórico de posições e preços ficam em sub-recursos paginados.
+        """
         
         # Resumo PNL
         pnl_summary = self.db.query(WebhookPnlSummary).filter(
@@ -185,12 +206,11 @@ class DashboardService:
             )
         ).first()
         
-        # Histórico de preços (simulado - seria obtido de API externa)
-        price_history = self._get_price_history(asset_name, start_date, end_date)
+        total_trades = pnl_summary.total_trades if pnl_summary else 0
         
         return {
             "asset_name": asset_name,
-            "total_trades": len(trades),
+            "total_trades": total_trades,
             "winning_trades": pnl_summary.winning_trades if pnl_summary else 0,
             "losing_trades": pnl_summary.losing_trades if pnl_summary else 0,
             "total_realized_pnl": pnl_summary.total_realized_pnl if pnl_summary else 0,
@@ -201,7 +221,7 @@ class DashboardService:
             "win_rate": pnl_summary.win_rate if pnl_summary else 0,
             "total_volume": pnl_summary.total_volume if pnl_summary else 0,
             "summary": {
-                "total_trades": len(trades),
+                "total_trades": total_trades,
                 "realized_pnl": pnl_summary.total_realized_pnl if pnl_summary else 0,
                 "unrealized_pnl": pnl_summary.total_unrealized_pnl if pnl_summary else 0,
                 "net_pnl": pnl_summary.net_pnl if pnl_summary else 0,
@@ -210,14 +230,37 @@ class DashboardService:
                 "total_volume": pnl_summary.total_volume if pnl_summary else 0
             },
             "current_position": {
-                "side": current_position.side if current_position else None,
-                "quantity": current_position.quantity if current_position else 0,
-                "avg_entry_price": current_position.avg_entry_price if current_position else 0,
-                "current_price": current_position.current_price if current_position else 0,
-                "unrealized_pnl": current_position.unrealized_pnl if current_position else 0,
-                "leverage": current_position.leverage if current_position else 1,
-                "opened_at": current_position.opened_at.isoformat() if current_position and current_position.opened_at else None
-            } if current_position else None,
+                "side": current_position.side,
+                "quantity": current_position.quantity,
+                "avg_entry_price": current_position.avg_entry_price,
+                "current_price": current_position.current_price,
+                "unrealized_pnl": current_position.unrealized_pnl,
+                "leverage": current_position.leverage,
+                "opened_at": current_position.opened_at.isoformat() if current_position.opened_at else None
+            } if current_position else None
+        }
+    
+    def get_asset_trades(
+        self,
+        user_id: int,
+        asset_name: str,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict:
+        """Trades de um ativo, mais recentes primeiro, paginados por cursor (timestamp, id)"""
+        
+        trade_filters = [WebhookTrade.user_id == user_id, WebhookTrade.asset_name == asset_name]
+        if start_date:
+            trade_filters.append(WebhookTrade.timestamp >= start_date)
+        if end_date:
+            trade_filters.append(WebhookTrade.timestamp <= end_date)
+        
+        query = self.db.query(WebhookTrade).filter(and_(*trade_filters))
+        trades, next_cursor = keyset_page(query, WebhookTrade.timestamp, WebhookTrade.id, cursor, limit)
+        
+        return {
             "trades": [
                 {
                     "id": trade.id,
@@ -232,7 +275,31 @@ class DashboardService:
                 }
                 for trade in trades
             ],
-            "positions_history": [
+            "next_cursor": next_cursor
+        }
+    
+    def get_asset_positions(
+        self,
+        user_id: int,
+        asset_name: str,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict:
+        """Histórico de posições de um ativo, paginado por cursor (opened_at, id)"""
+        
+        position_filters = [WebhookPosition.user_id == user_id, WebhookPosition.asset_name == asset_name]
+        if start_date:
+            position_filters.append(WebhookPosition.opened_at >= start_date)
+        if end_date:
+            position_filters.append(WebhookPosition.opened_at <= end_date)
+        
+        query = self.db.query(WebhookPosition).filter(and_(*position_filters))
+        positions, next_cursor = keyset_page(query, WebhookPosition.opened_at, WebhookPosition.id, cursor, limit)
+        
+        return {
+            "positions": [
                 {
                     "id": pos.id,
                     "side": pos.side,
@@ -248,91 +315,139 @@ class DashboardService:
                 }
                 for pos in positions
             ],
-            "price_history": price_history
+            "next_cursor": next_cursor
         }
     
-    def _get_period_pnl(self, user_id: int, start_date, end_date) -> Dict:
-        """Calcula PNL para um período específico"""
+    def get_asset_price_history(
+        self,
+        asset_name: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        points: int = 500,
+        interval: Optional[str] = None
+    ) -> Dict:
+        """Histórico de preços OHLCV de um ativo, a partir do cache local de candles"""
         
-        start_datetime = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=timezone.utc)
-        end_datetime = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=timezone.utc)
+        end_date = end_date or datetime.now(timezone.utc)
+        start_date = start_date or end_date - timedelta(days=30)
         
-        return self.pnl_calculator.get_pnl_by_period(user_id, start_datetime, end_datetime)
+        series = CandleStore(self.db).get_series(asset_name, start_date, end_date, points, interval)
+        return {
+            "asset_name": asset_name,
+            "interval": series["interval"],
+            "price_history": series["candles"]
+        }
     
-    def _get_price_history(self, asset_name: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> List[Dict]:
-        """Obtém histórico de preços (placeholder - implementar com API externa)"""
-        
-        # Placeholder - em produção, buscar de API externa como CoinGecko, Binance, etc.
-        # Por enquanto, retorna dados simulados
+    def _get_period_pnl(self, user_id: int, start_date, end_date) -> Dict:
+        """Calcula PNL para um período específico (dias inteiros, a partir do rollup diário)"""
         
+        return PnlRollup(self.db).get_period_pnl(user_id, start_date, end_date)
+    
+    def get_equity_curve(
+        self,
+        user_id: int,
+        bucket: str = "day",
+        points: int = 200,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict:
+        """
+        Série de PNL acumulado (realizado - taxas) agrupada por hora, dia ou semana
+        Dia/semana saem do rollup pnl_daily; hora é agregada a partir dos dados brutos
+        numa janela limitada. A série é reduzida no servidor para no máximo `points` pontos.
+        """
+        end_date = end_date or datetime.now(timezone.utc).date()
         if not start_date:
-            start_date = datetime.now(timezone.utc) - timedelta(days=30)
-        if not end_date:
-            end_date = datetime.now(timezone.utc)
-        
-        # Simular dados de preço (substituir por API real)
-        price_points = []
-        current_date = start_date
-        base_price = 100.0  # Preço base simulado
-        
-        while current_date <= end_date:
-            # Simular variação de preço
-            import random
-            price_change = random.uniform(-5, 5)
-            base_price += price_change
-            
-            price_points.append({
-                "timestamp": current_date.isoformat(),
-                "price": round(base_price, 2),
-                "volume": random.uniform(1000, 10000)
+            start_date = end_date - timedelta(days=EQUITY_CURVE_DEFAULT_DAYS[bucket])
+        if bucket == "hour":
+            start_date = max(start_date, end_date - timedelta(days=EQUITY_CURVE_MAX_HOURLY_DAYS))
+        
+        rollup = PnlRollup(self.db)
+        
+        # PNL acumulado antes do início da janela
+        baseline = rollup.get_period_pnl(user_id, date.min, start_date - timedelta(days=1))["period_pnl"]
+        
+        if bucket == "hour":
+            buckets = self._get_hourly_pnl(user_id, start_date, end_date)
+        else:
+            buckets = []
+            for row in rollup.get_daily_series(user_id, start_date, end_date):
+                bucket_start = row["day"]
+                if bucket == "week":
+                    bucket_start = bucket_start - timedelta(days=bucket_start.weekday())
+                bucket_start = datetime.combine(bucket_start, datetime.min.time()).replace(tzinfo=timezone.utc)
+                
+                if buckets and buckets[-1][0] == bucket_start:
+                    buckets[-1] = (bucket_start, buckets[-1][1] + row["pnl"], buckets[-1][2] + row["trades"])
+                else:
+                    buckets.append((bucket_start, row["pnl"], row["trades"]))
+        
+        series = []
+        cumulative = baseline
+        for bucket_start, pnl, trades in buckets:
+            cumulative += pnl
+            series.append({
+                "timestamp": bucket_start.isoformat(),
+                "pnl": pnl,
+                "cumulative_pnl": cumulative,
+                "trades": trades
             })
-            
-            current_date += timedelta(hours=1)
         
-        return price_points
+        return {
+            "bucket": bucket,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "baseline_pnl": baseline,
+            "total_buckets": len(series),
+            "points": _downsample_series(series, points)
+        }
     
-    def update_account_snapshot(self, user_id: int, client: HyperliquidClient):
-        """Cria snapshot da conta"""
-        
-        try:
-            # Atualizar PNL não realizado primeiro
-            self.pnl_calculator.update_unrealized_pnl(user_id, client)
-            
-            # Calcular valores totais
-            pnl_summaries = self.db.query(WebhookPnlSummary).filter(
-                WebhookPnlSummary.user_id == user_id
-            ).all()
-            
-            total_realized_pnl = sum(s.total_realized_pnl for s in pnl_summaries)
-            total_unrealized_pnl = sum(s.total_unrealized_pnl for s in pnl_summaries)
-            total_fees = sum(s.total_fees for s in pnl_summaries)
-            
-            # Obter saldo da conta (se disponível via API)
-            account_balance = 0.0
-            try:
-                account_balance = client.get_account_balance() or 0.0
-            except:
-                pass
-            
-            # Criar snapshot
-            snapshot = AccountSnapshot(
-                user_id=user_id,
-                account_balance=account_balance,
-                total_realized_pnl=total_realized_pnl,
-                total_unrealized_pnl=total_unrealized_pnl,
-                net_pnl=total_realized_pnl + total_unrealized_pnl - total_fees,
-                total_fees=total_fees,
-                timestamp=datetime.now(timezone.utc)
+    def _get_hourly_pnl(self, user_id: int, start_date: date, end_date: date) -> List[tuple]:
+        """Agrupa por hora o PNL realizado e as taxas de uma janela curta"""
+        start_datetime = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=timezone.utc)
+        end_datetime = datetime.combine(end_date + timedelta(days=1), datetime.min.time()).replace(tzinfo=timezone.utc)
+        
+        closed_positions = self.db.query(WebhookPosition.closed_at, WebhookPosition.realized_pnl).filter(
+            and_(
+                WebhookPosition.user_id == user_id,
+                WebhookPosition.is_open == False,
+                WebhookPosition.closed_at >= start_datetime,
+                WebhookPosition.closed_at < end_datetime
             )
-            
-            self.db.add(snapshot)
-            self.db.commit()
-            
-            return snapshot
-            
-        except Exception as e:
-            print(f"Erro ao criar snapshot da conta: {e}")
+        ).all()
+        
+        trades = self.db.query(WebhookTrade.timestamp, WebhookTrade.fees).filter(
+            and_(
+                WebhookTrade.user_id == user_id,
+                WebhookTrade.timestamp >= start_datetime,
+                WebhookTrade.timestamp < end_datetime
+            )
+        ).all()
+        
+        hours: Dict[datetime, list] = {}
+        for closed_at, realized_pnl in closed_positions:
+            hour = closed_at.replace(minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+            hours.setdefault(hour, [0.0, 0])[0] += realized_pnl or 0.0
+        for timestamp, fees in trades:
+            hour = timestamp.replace(minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+            entry = hours.setdefault(hour, [0.0, 0])
+            entry[0] -= fees or 0.0
+            entry[1] += 1
+        
+        return [(hour, pnl, count) for hour, (pnl, count) in sorted(hours.items())]
+    
+    def update_account_snapshot(self, user_id: int, client: HyperliquidClient) -> Optional[AccountSnapshot]:
+        """Cria snapshot da conta a partir do user_state da Hyperliquid"""
+        
+        wallet = self.db.query(Wallet).filter(Wallet.user_id == user_id).first()
+        if not wallet or not wallet.public_address:
             return None
+        
+        user_state = client.get_user_state(wallet.public_address)
+        if not user_state:
+            return None
+        
+        return record_account_snapshot(self.db, user_id, user_state)
     
     def get_account_snapshots(
         self, 
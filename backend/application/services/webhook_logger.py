@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from fastapi import Request
 from sqlalchemy.orm import Session
 from domain.models import WebhookConfig, WebhookLog
+from infrastructure.services.event_bus import publish_user_event, user_has_stream
 
 def create_webhook_log(
     db: Session,
@@ -31,4 +32,14 @@ def create_webhook_log(
     )
     db.add(log)
     db.commit()
+    
+    if user_has_stream(webhook_config.user_id):
+        publish_user_event(webhook_config.user_id, "log", {
+            "id": log.id,
+            "webhook_config_id": log.webhook_config_id,
+            "timestamp": log.timestamp.isoformat(),
+            "response_status": log.response_status,
+            "is_success": log.is_success,
+            "error_message": log.error_message
+        })
     return log
\ No newline at end of file
@@ -0,0 +1,41 @@
+from application.services.background_jobs import background_jobs_stats
+from infrastructure.database import engine
+from infrastructure.db_pool import pool_stats
+from infrastructure.external.hyperliquid_client import user_state_cache
+from infrastructure.external.info_coalescing import info_coalescing_stats
+from infrastructure.external.rate_limiter import hyperliquid_limiter
+from infrastructure.external.resilience import upstream_stats
+from infrastructure.services.dashboard_cache import dashboard_cache_stats
+from infrastructure.services.event_bus import dashboard_events
+from infrastructure.services.position_book import position_book
+from infrastructure.shared_cache import market_cache
+
+def get_cache_stats() -> dict:
+    """
+    Estatísticas de todos os caches do processo (para dimensionamento)
+    dashboard: respostas do dashboard; user_state: estado das carteiras na Hyperliquid;
+    info: coalescência das chamadas /info; market: cache compartilhado de dados de mercado
+    """
+    return {
+        "dashboard": dashboard_cache_stats(),
+        "user_state": user_state_cache.stats(),
+        "info": info_coalescing_stats(),
+        "market": market_cache.stats()
+    }
+
+def get_stream_stats() -> dict:
+    """Quantidade de streams SSE abertos e eventos publicados/descartados"""
+    return dashboard_events.stats()
+
+def get_background_jobs_stats() -> dict:
+    """Jobs periódicos, livro de posições e saúde das chamadas à Hyperliquid (rate limit, breaker, hedge)"""
+    return {
+        "jobs": background_jobs_stats(),
+        "position_book": position_book.stats(),
+        "hyperliquid_rate_limit": hyperliquid_limiter.stats(),
+        "hyperliquid_upstream": upstream_stats()
+    }
+
+def get_database_pool_stats() -> dict:
+    """Ocupação do pool de conexões do banco e tempo de espera no checkout"""
+    return pool_stats(engine)
@@ -1,6 +1,8 @@
-from typing import List, Optional
+import asyncio
+import json
+from typing import AsyncIterator, List, Optional
 from datetime import date, datetime, timezone, timedelta
-from fastapi import HTTPException, status, Query
+from fastapi import HTTPException, Request, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc
 from domain.models import User, WebhookTrade, WebhookPosition, WebhookConfig, AccountSnapshot
@@ -10,86 +12,167 @@ from domain.schemas import (
 )
 from infrastructure.external.hyperliquid_client import HyperliquidClient
 from application.services.dashboard_service import DashboardService
+from infrastructure.pagination import keyset_page, bounded_count
+from infrastructure.fast_json import to_columnar
+from infrastructure.services.dashboard_cache import cached_dashboard_response
+from infrastructure.services.event_bus import dashboard_events
+from infrastructure.services.position_book import position_book
+from infrastructure.database import SessionLocal
+from infrastructure.security import get_user_from_token, get_user_from_stream_ticket, create_stream_ticket
+from config import STREAM_HEARTBEAT_SECONDS, STREAM_TICKET_TTL_SECONDS
 
 def get_dashboard_summary(user: User, period: str, db: Session) -> dict:
     """Obtém resumo completo do dashboard"""
     dashboard_service = DashboardService(db)
-    summary = dashboard_service.get_dashboard_summary(user.id, period)
-    return summary
+    return cached_dashboard_response(
+        user, "summary", period,
+        lambda: dashboard_service.get_dashboard_summary(user.id, period)
+    )
 
-def get_assets_performance(user: User, period: str, db: Session) -> List[WebhookPnlSummaryResponse]:
+def get_assets_performance(user: User, period: str, db: Session) -> List[dict]:
     """Obtém performance por ativo"""
     dashboard_service = DashboardService(db)
-    assets_data = dashboard_service.get_assets_performance(user.id, period)
+    return cached_dashboard_response(
+        user, "assets", period,
+        lambda: _to_pnl_summary_rows(dashboard_service.get_assets_performance(user.id, period))
+    )
+
+def get_dashboard_data(user: User, period: str, db: Session) -> dict:
+    """Obtém resumo do dashboard e performance por ativo, calculando os ativos uma única vez"""
+    dashboard_service = DashboardService(db)
+    
+    def build() -> dict:
+        assets_data = dashboard_service.get_assets_performance(user.id, period)
+        summary = dashboard_service.get_dashboard_summary(user.id, period, assets_pnl=assets_data)
+        return {
+            "summary": summary,
+            "asset_performance": _to_pnl_summary_rows(assets_data)
+        }
     
-    # Converter para o formato correto do WebhookPnlSummaryResponse
+    return cached_dashboard_response(user, "dashboard", period, build)
+
+def _to_pnl_summary_rows(assets_data: List[dict]) -> List[dict]:
+    """Converte a performance por ativo para o formato de WebhookPnlSummaryResponse (dicts simples)"""
     return [
-        WebhookPnlSummaryResponse(
-            id=0,  # Placeholder ID
-            trading_view_symbol=asset["asset_name"],
-            total_trades=asset["total_trades"],
-            winning_trades=asset["winning_trades"],
-            losing_trades=asset["losing_trades"],
-            total_realized_pnl=asset["realized_pnl"],
-            total_unrealized_pnl=asset["unrealized_pnl"],
-            total_fees=asset["total_fees"],
-            net_pnl=asset["net_pnl"],
-            win_rate=asset["win_rate"],
-            avg_win=asset["avg_win"],
-            avg_loss=asset["avg_loss"],
-            largest_win=asset["largest_win"],
-            largest_loss=asset["largest_loss"],
-            total_volume=asset["total_volume"],
-            last_updated=asset["last_updated"] or datetime.now(timezone.utc).isoformat()
-        )
+        {
+            "id": 0,  # Placeholder ID
+            "trading_view_symbol": asset["asset_name"],
+            "total_trades": asset["total_trades"],
+            "winning_trades": asset["winning_trades"],
+            "losing_trades": asset["losing_trades"],
+            "total_realized_pnl": asset["realized_pnl"],
+            "total_unrealized_pnl": asset["unrealized_pnl"],
+            "total_fees": asset["total_fees"],
+            "net_pnl": asset["net_pnl"],
+            "win_rate": asset["win_rate"],
+            "avg_win": asset["avg_win"],
+            "avg_loss": asset["avg_loss"],
+            "largest_win": asset["largest_win"],
+            "largest_loss": asset["largest_loss"],
+            "total_volume": asset["total_volume"],
+            "last_updated": asset["last_updated"] or datetime.now(timezone.utc).isoformat()
+        }
         for asset in assets_data
     ]
 
-def get_asset_detailed_performance(user: User, trading_view_symbol: str, period: str, 
-                                 start_date: Optional[date], end_date: Optional[date], db: Session) -> dict:
-    """Obtém performance detalhada de um ativo específico"""
-    from dashboard_service import DashboardService
+def get_asset_detailed_performance(user: User, trading_view_symbol: str, db: Session) -> dict:
+    """Obtém o cabeçalho de performance de um ativo (resumo + posição atual)"""
     dashboard_service = DashboardService(db)
+    return cached_dashboard_response(
+        user, f"asset:{trading_view_symbol}", None,
+        lambda: dashboard_service.get_asset_detailed_performance(user.id, trading_view_symbol)
+    )
+
+def get_asset_trades(user: User, trading_view_symbol: str, cursor: Optional[str], limit: int,
+                     start_date: Optional[date], end_date: Optional[date], response_format: str, db: Session) -> dict:
+    """Obtém trades de um ativo com paginação por cursor"""
+    dashboard_service = DashboardService(db)
+    start_datetime, end_datetime = _to_datetime_range(start_date, end_date)
+    result = dashboard_service.get_asset_trades(
+        user.id, trading_view_symbol, cursor, limit, start_datetime, end_datetime
+    )
+    return _apply_format(result, "trades", response_format)
+
+def get_asset_positions_history(user: User, trading_view_symbol: str, cursor: Optional[str], limit: int,
+                                start_date: Optional[date], end_date: Optional[date], response_format: str,
+                                db: Session) -> dict:
+    """Obtém histórico de posições de um ativo com paginação por cursor"""
+    dashboard_service = DashboardService(db)
+    start_datetime, end_datetime = _to_datetime_range(start_date, end_date)
+    result = dashboard_service.get_asset_positions(
+        user.id, trading_view_symbol, cursor, limit, start_datetime, end_datetime
+    )
+    return _apply_format(result, "positions", response_format)
+
+def get_asset_price_history(user: User, trading_view_symbol: str, start_date: Optional[date],
+                            end_date: Optional[date], points: int, interval: Optional[str],
+                            response_format: str, db: Session) -> dict:
+    """Obtém histórico de preços (candles) de um ativo"""
+    dashboard_service = DashboardService(db)
+    start_datetime, end_datetime = _to_datetime_range(start_date, end_date)
+    result = dashboard_service.get_asset_price_history(
+        trading_view_symbol, start_datetime, end_datetime, points, interval
+    )
+    return _apply_format(result, "price_history", response_format)
+
+def _apply_format(result: dict, list_key: str, response_format: str) -> dict:
+    """format=columnar troca a lista de objetos por arrays paralelos"""
+    if response_format == "columnar":
+        result[list_key] = to_columnar(result[list_key])
+        result["format"] = "columnar"
+    return result
+
+def _to_datetime_range(start_date: Optional[date], end_date: Optional[date]):
+    """Converte datas em limites UTC inclusivos (apenas as que foram fornecidas)"""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date deve ser anterior a end_date"
+        )
     
     start_datetime = None
     end_datetime = None
-    
-    # Apenas aplicar filtros de data se start_date ou end_date foram explicitamente fornecidos
     if start_date:
         start_datetime = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=timezone.utc)
     if end_date:
         end_datetime = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=timezone.utc)
-    
-    detailed_data = dashboard_service.get_asset_detailed_performance(
-        user.id, trading_view_symbol, start_datetime, end_datetime
-    )
-    return detailed_data
+    return start_datetime, end_datetime
 
-def get_asset_webhook_executions(user: User, trading_view_symbol: str, page: int, limit: int, db: Session) -> dict:
-    """Obtém execuções de webhooks paginadas para um ativo específico"""
-    # Calcular offset
-    offset = (page - 1) * limit
-    
-    # Buscar trades com paginação
-    trades = db.query(WebhookTrade).filter(
-        and_(
-            WebhookTrade.user_id == user.id,
-            WebhookTrade.asset_name == trading_view_symbol
+def get_equity_curve(user: User, bucket: str, points: int, start_date: Optional[date],
+                     end_date: Optional[date], db: Session) -> dict:
+    """Obtém a curva de PNL acumulado do usuário"""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date deve ser anterior a end_date"
         )
-    ).order_by(desc(WebhookTrade.timestamp)).offset(offset).limit(limit).all()
     
-    # Contar total de trades
-    total_count = db.query(WebhookTrade).filter(
+    dashboard_service = DashboardService(db)
+    return dashboard_service.get_equity_curve(user.id, bucket, points, start_date, end_date)
+
+def get_asset_webhook_executions(user: User, trading_view_symbol: str, cursor: Optional[str], limit: int,
+                                 include_total: bool, db: Session) -> dict:
+    """Obtém execuções de webhooks de um ativo com paginação por cursor (timestamp, id)"""
+    query = db.query(WebhookTrade).filter(
         and_(
             WebhookTrade.user_id == user.id,
             WebhookTrade.asset_name == trading_view_symbol
         )
-    ).count()
+    )
+    
+    trades, next_cursor = keyset_page(query, WebhookTrade.timestamp, WebhookTrade.id, cursor, limit)
+    
+    pagination = {
+        "items_per_page": limit,
+        "next_cursor": next_cursor,
+        "has_next": next_cursor is not None
+    }
     
-    # Calcular informações de paginação
-    total_pages = (total_count + limit - 1) // limit
-    has_next = page < total_pages
-    has_prev = page > 1
+    # Contagem só quando pedida, e limitada
+    if include_total:
+        total_count, is_estimate = bounded_count(query)
+        pagination["total_items"] = total_count
+        pagination["total_is_estimate"] = is_estimate
     
     return {
         "webhooks": [
@@ -109,14 +192,7 @@ def get_asset_webhook_executions(user: User, trading_view_symbol: str, page: int
             }
             for trade in trades
         ],
-        "pagination": {
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_items": total_count,
-            "items_per_page": limit,
-            "has_next": has_next,
-            "has_prev": has_prev
-        }
+        "pagination": pagination
     }
 
 def get_webhook_execution_details(user: User, webhook_id: int, db: Session) -> dict:
@@ -192,38 +268,44 @@ def get_pnl_by_period(user: User, period_request: PnlPeriodRequest, db: Session)
     period_pnl = pnl_calculator.get_pnl_by_period(user.id, start_datetime, end_datetime)
     return period_pnl
 
-def get_user_trades(user: User, limit: int, offset: int, trading_view_symbol: Optional[str], db: Session) -> List[WebhookTradeResponse]:
-    """Obtém histórico de trades do usuário"""
+def get_user_trades(user: User, limit: int, cursor: Optional[str], trading_view_symbol: Optional[str],
+                    include_total: bool, db: Session) -> dict:
+    """
+    Obtém histórico de trades do usuário com paginação por cursor (timestamp, id)
+    Seleciona só as colunas da resposta e devolve dicts prontos para serialização direta.
+    """
     filters = [WebhookTrade.user_id == user.id]
     
     if trading_view_symbol:
         filters.append(WebhookTrade.asset_name == trading_view_symbol)
     
-    trades = db.query(WebhookTrade).filter(
-        and_(*filters)
-    ).order_by(desc(WebhookTrade.timestamp)).offset(offset).limit(limit).all()
+    query = db.query(
+        WebhookTrade.id,
+        WebhookTrade.webhook_config_id,
+        WebhookTrade.asset_name.label("trading_view_symbol"),
+        WebhookTrade.trade_type,
+        WebhookTrade.side,
+        WebhookTrade.quantity,
+        WebhookTrade.price,
+        WebhookTrade.usd_value,
+        WebhookTrade.leverage,
+        WebhookTrade.timestamp,
+        WebhookTrade.order_id,
+        WebhookTrade.fees
+    ).filter(and_(*filters))
+    rows, next_cursor = keyset_page(query, WebhookTrade.timestamp, WebhookTrade.id, cursor, limit)
     
-    return [
-        WebhookTradeResponse(
-            id=trade.id,
-            webhook_config_id=trade.webhook_config_id,
-            user_id=trade.user_id,
-            asset_name=trade.asset_name,
-            trade_type=trade.trade_type,
-            side=trade.side,
-            quantity=trade.quantity,
-            price=trade.price,
-            usd_value=trade.usd_value,
-            leverage=trade.leverage,
-            order_id=trade.order_id,
-            fees=trade.fees,
-            timestamp=trade.timestamp
-        )
-        for trade in trades
-    ]
+    total, total_is_estimate = bounded_count(query) if include_total else (None, False)
+    
+    return {
+        "items": [row._asdict() for row in rows],
+        "next_cursor": next_cursor,
+        "total": total,
+        "total_is_estimate": total_is_estimate
+    }
 
-def get_user_positions(user: User, only_open: bool, trading_view_symbol: Optional[str], db: Session) -> List[WebhookPositionResponse]:
-    """Obtém posições do usuário"""
+def get_user_positions(user: User, only_open: bool, trading_view_symbol: Optional[str], db: Session) -> List[dict]:
+    """Obtém posições do usuário (dicts no formato de WebhookPositionResponse)"""
     filters = [WebhookPosition.user_id == user.id]
     
     if only_open:
@@ -232,32 +314,29 @@ def get_user_positions(user: User, only_open: bool, trading_view_symbol: Optiona
     if trading_view_symbol:
         filters.append(WebhookPosition.asset_name == trading_view_symbol)
     
-    positions = db.query(WebhookPosition).filter(
+    rows = db.query(
+        WebhookPosition.id,
+        WebhookPosition.webhook_config_id,
+        WebhookPosition.user_id,
+        WebhookPosition.asset_name,
+        WebhookPosition.asset_name.label("trading_view_symbol"),
+        WebhookPosition.side,
+        WebhookPosition.quantity,
+        WebhookPosition.avg_entry_price,
+        WebhookPosition.current_price,
+        WebhookPosition.unrealized_pnl,
+        WebhookPosition.realized_pnl,
+        WebhookPosition.total_fees,
+        WebhookPosition.leverage,
+        WebhookPosition.is_open,
+        WebhookPosition.opened_at,
+        WebhookPosition.closed_at,
+        WebhookPosition.last_updated
+    ).filter(
         and_(*filters)
     ).order_by(desc(WebhookPosition.last_updated)).all()
     
-    return [
-        WebhookPositionResponse(
-            id=position.id,
-            webhook_config_id=position.webhook_config_id,
-            user_id=position.user_id,
-            asset_name=position.asset_name,
-            trading_view_symbol=position.asset_name,
-            side=position.side,
-            quantity=position.quantity,
-            avg_entry_price=position.avg_entry_price,
-            current_price=position.current_price,
-            leverage=position.leverage,
-            realized_pnl=position.realized_pnl,
-            unrealized_pnl=position.unrealized_pnl,
-            total_fees=position.total_fees,
-            is_open=position.is_open,
-            opened_at=position.opened_at.isoformat() if position.opened_at else None,
-            closed_at=position.closed_at.isoformat() if position.closed_at else None,
-            last_updated=position.last_updated.isoformat() if position.last_updated else None
-        )
-        for position in positions
-    ]
+    return [row._asdict() for row in rows]
 
 def update_unrealized_pnl(user: User, db: Session) -> dict:
     """Atualiza PNL não realizado de todas as posições abertas"""
@@ -269,12 +348,15 @@ def update_unrealized_pnl(user: User, db: Session) -> dict:
     
     try:
         client = HyperliquidClient()
-        from pnl_calculator import PnlCalculator
+        from infrastructure.services.pnl_calculator import PnlCalculator
         pnl_calculator = PnlCalculator(db)
         
-        pnl_calculator.update_unrealized_pnl(user.id, client)
+        affected = pnl_calculator.update_unrealized_pnl(user.id, client)
         
-        return {"message": "PNL não realizado atualizado com sucesso"}
+        return {
+            "message": "PNL não realizado atualizado com sucesso",
+            "updated_assets": sorted(affected.get(user.id, ()))
+        }
     
     except Exception as e:
         raise HTTPException(
@@ -292,22 +374,25 @@ def create_account_snapshot(user: User, db: Session) -> dict:
     
     try:
         client = HyperliquidClient()
-        from pnl_calculator import PnlCalculator
-        pnl_calculator = PnlCalculator(db)
-        
-        snapshot = pnl_calculator.create_account_snapshot(user.id, client)
-        
-        return {
-            "message": "Snapshot criado com sucesso",
-            "snapshot_id": snapshot.id,
-            "timestamp": snapshot.timestamp.isoformat()
-        }
-    
+        dashboard_service = DashboardService(db)
+        snapshot = dashboard_service.update_account_snapshot(user.id, client)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao criar snapshot: {str(e)}"
         )
+    
+    if not snapshot:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Não foi possível obter o estado da conta na Hyperliquid"
+        )
+    
+    return {
+        "message": "Snapshot criado com sucesso",
+        "snapshot_id": snapshot.id,
+        "timestamp": snapshot.timestamp.isoformat()
+    }
 
 def get_account_snapshots(user: User, limit: int, db: Session) -> List[AccountSnapshotResponse]:
     """Obtém histórico de snapshots da conta"""
@@ -318,17 +403,12 @@ def get_account_snapshots(user: User, limit: int, db: Session) -> List[AccountSn
     return [
         AccountSnapshotResponse(
             id=snapshot.id,
-            user_id=snapshot.user_id,
-            total_account_value=snapshot.total_account_value,
-            total_realized_pnl=snapshot.total_realized_pnl,
+            total_balance=snapshot.total_balance,
+            available_balance=snapshot.available_balance,
+            used_margin=snapshot.used_margin,
             total_unrealized_pnl=snapshot.total_unrealized_pnl,
-            total_fees=snapshot.total_fees,
-            net_pnl=snapshot.net_pnl,
-            total_trades=snapshot.total_trades,
-            winning_trades=snapshot.winning_trades,
-            losing_trades=snapshot.losing_trades,
-            win_rate=snapshot.win_rate,
-            timestamp=snapshot.timestamp
+            total_positions_value=snapshot.total_positions_value,
+            timestamp=snapshot.timestamp.isoformat()
         )
         for snapshot in snapshots
     ]
@@ -348,4 +428,61 @@ def recalculate_user_pnl(user: User, db: Session) -> dict:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao recalcular PNL: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+def get_stream_user_id(token: Optional[str], ticket: Optional[str]) -> int:
+    """
+    Autentica o stream pelo header Authorization ou por um ticket de curta duração
+    no parâmetro ticket (EventSource não permite headers). Usa uma sessão curta para
+    não prender uma conexão do pool durante todo o stream.
+    """
+    if not token and not ticket:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
+    
+    db = SessionLocal()
+    try:
+        if token:
+            return get_user_from_token(token, db).id
+        return get_user_from_stream_ticket(ticket, db).id
+    finally:
+        db.close()
+
+def issue_stream_ticket(user: User) -> dict:
+    """Ticket para abrir o stream SSE; expira em STREAM_TICKET_TTL_SECONDS"""
+    return {"ticket": create_stream_ticket(user.id), "expires_in": STREAM_TICKET_TTL_SECONDS}
+
+async def dashboard_event_stream(user_id: int, request: Request) -> AsyncIterator[str]:
+    """Eventos do dashboard (trade, position, pnl, log) no formato Server-Sent Events"""
+    subscription = dashboard_events.subscribe(user_id)
+    try:
+        yield _format_sse("ready", {"user_id": user_id})
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                # Comentário SSE: mantém a conexão viva em proxies
+                yield ": keepalive\n\n"
+                continue
+            yield _format_sse(event["type"], event)
+    finally:
+        dashboard_events.unsubscribe(subscription)
+
+def get_position_book(user: User) -> dict:
+    """Posições abertas do usuário marcadas a mercado pelo livro em memória (sem consulta ao banco)"""
+    if not position_book.loaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Livro de posições desativado (POSITION_BOOK_ENABLED)"
+        )
+    
+    positions = position_book.user_positions(user.id)
+    return {
+        "positions": positions,
+        "total_unrealized_pnl": sum(position["unrealized_pnl"] for position in positions),
+        "last_tick_at": position_book.last_tick_at.isoformat() if position_book.last_tick_at else None
+    }
+
+def _format_sse(event_type: str, payload: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(payload, default=str)}\n\n"
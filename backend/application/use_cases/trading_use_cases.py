@@ -1,109 +1,158 @@
+import hashlib
 import time
-from typing import List
+from typing import List, Optional
+import orjson
+from fastapi import HTTPException, status
+from config import (
+    META_RESPONSE_TTL_SECONDS, META_RESPONSE_STALE_SECONDS, ASSET_RULES_CACHE_TTL_SECONDS,
+    HYPERLIQUID_ASSETS_CACHE_SECONDS, HYPERLIQUID_ASSETS_STALE_SECONDS
+)
 from infrastructure.external.hyperliquid_client import HyperliquidClient
+from infrastructure.external.rate_limiter import HyperliquidUnavailable
+from infrastructure.http_cache import build_etag
+from infrastructure.shared_cache import market_cache
 
-_assets_cache = None
-_cache_timestamp = 0
-CACHE_DURATION = 24 * 60 * 60
+# Campos de contexto repassados ao frontend (mesmos nomes da API da Hyperliquid)
+META_CONTEXT_FIELDS = ("markPx", "midPx", "oraclePx", "funding", "openInterest", "dayNtlVlm", "prevDayPx", "premium")
 
 def get_meta_info() -> dict:
-    """Obtém informações de metadados da Hyperliquid"""
+    """
+    Universo de ativos + contexto de mercado, de uma única chamada metaAndAssetCtxs
+    Resposta compartilhada por todos os usuários (e workers) por META_RESPONSE_TTL_SECONDS, com ETag do conteúdo.
+    Retorna {"payload", "etag", "generated_at" (epoch)}.
+    """
+    return market_cache.get(
+        "meta", _build_meta_response,
+        fresh_seconds=META_RESPONSE_TTL_SECONDS, stale_seconds=META_RESPONSE_STALE_SECONDS
+    )
+
+def _build_meta_response() -> dict:
     client = HyperliquidClient()
-    meta = client.info.meta()
-    
     try:
-        all_mids = client.get_all_mids()
-        contexts = []
-        
-        if meta and 'universe' in meta:
-            for asset in meta['universe']:
-                trading_view_symbol = asset.get('name')
-                mark_price = all_mids.get(trading_view_symbol, 0.0)
-                contexts.append({
-                    'markPx': str(mark_price)
-                })
-        
-        return {
-            'universe': meta.get('universe', []),
-            'contexts': contexts
-        }
+        meta, asset_ctxs = client.get_meta_and_asset_ctxs()
+    except HyperliquidUnavailable:
+        raise
     except Exception as e:
-        print(f"Error fetching meta with prices: {e}")
-        return meta
+        print(f"Error fetching meta and asset contexts: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Não foi possível buscar os metadados da Hyperliquid"
+        )
+    
+    payload = {
+        "universe": meta.get("universe", []),
+        "contexts": [
+            {field: context.get(field) for field in META_CONTEXT_FIELDS}
+            for context in asset_ctxs
+        ]
+    }
+    return {
+        "payload": payload,
+        "etag": build_etag(hashlib.sha1(orjson.dumps(payload)).hexdigest()),
+        "generated_at": time.time()
+    }
+
+# Índice por nome da última lista de regras lida do cache (refeito só quando a lista muda)
+_asset_rules_index = (None, {})
+
+def get_asset_rules() -> dict:
+    """
+    Regras de tamanho de todos os ativos a partir de um único meta()
+    Retorna {"assets": [...] na ordem do universo, "by_name": {nome: regra}}; cache de ASSET_RULES_CACHE_TTL_SECONDS
+    """
+    global _asset_rules_index
+    assets = market_cache.get(
+        "asset_rules", _build_asset_rules,
+        fresh_seconds=ASSET_RULES_CACHE_TTL_SECONDS, stale_seconds=ASSET_RULES_CACHE_TTL_SECONDS
+    )
+    indexed_assets, by_name = _asset_rules_index
+    if indexed_assets is not assets:
+        by_name = {asset["name"]: asset for asset in assets}
+        _asset_rules_index = (assets, by_name)
+    return {"assets": assets, "by_name": by_name}
+
+def _build_asset_rules() -> dict:
+    meta = HyperliquidClient().info.meta()
+    assets = []
+    for index, asset in enumerate(meta.get("universe", [])):
+        sz_decimals = asset.get("szDecimals", 0)
+        assets.append({
+            "name": asset.get("name"),
+            "info": {
+                "index": index,
+                "szDecimals": sz_decimals,
+                "min_size": 10 ** (-sz_decimals),
+                "maxLeverage": asset.get("maxLeverage"),
+                "onlyIsolated": asset.get("onlyIsolated", False),
+                "isDelisted": asset.get("isDelisted", False)
+            },
+            "universe_data": asset
+        })
+    return assets
 
 def debug_asset_rules(trading_view_symbol: str) -> dict:
     """Obtém as regras específicas de um ativo para debug"""
-    client = HyperliquidClient()
     try:
-        asset_info = client.get_asset_info(trading_view_symbol)
+        asset = get_asset_rules()["by_name"].get(trading_view_symbol)
+    except HyperliquidUnavailable:
+        raise
+    except Exception as e:
         return {
             "asset_name": trading_view_symbol,
-            "asset_info": asset_info,
-            "exists": True
+            "error": str(e),
+            "exists": False
         }
-    except Exception as e:
+    if asset is None:
         return {
             "asset_name": trading_view_symbol,
-            "error": str(e),
+            "error": f"Não foi possível encontrar metadados para o ativo {trading_view_symbol}",
             "exists": False
         }
+    return {
+        "asset_name": trading_view_symbol,
+        "asset_info": asset["universe_data"],
+        "rules": asset["info"],
+        "exists": True
+    }
 
-def list_all_assets() -> dict:
-    """Lista todos os ativos disponíveis com suas regras de tamanho"""
-    client = HyperliquidClient()
+def list_all_assets(search: Optional[str] = None, include_delisted: bool = True, offset: int = 0, limit: Optional[int] = None) -> dict:
+    """Lista os ativos disponíveis com suas regras de tamanho (filtro por nome e paginação)"""
     try:
-        meta = client.info.meta()
-        assets = []
-        
-        if meta and 'universe' in meta:
-            for asset in meta['universe']:
-                trading_view_symbol = asset.get('name')
-                try:
-                    asset_info = client.get_asset_info(trading_view_symbol)
-                    assets.append({
-                        "name": trading_view_symbol,
-                        "info": asset_info,
-                        "universe_data": asset
-                    })
-                except Exception as e:
-                    assets.append({
-                        "name": trading_view_symbol,
-                        "error": str(e),
-                        "universe_data": asset
-                    })
-        
-        return {
-            "total_assets": len(assets),
-            "assets": assets
-        }
+        assets = get_asset_rules()["assets"]
+    except HyperliquidUnavailable:
+        raise
     except Exception as e:
         return {
             "error": str(e),
             "total_assets": 0,
             "assets": []
         }
-
-def get_hyperliquid_assets() -> List[str]:
-    """Busca lista de ativos da Hyperliquid com cache de 24h"""
-    global _assets_cache, _cache_timestamp
     
-    current_time = time.time()
+    if search:
+        term = search.upper()
+        assets = [asset for asset in assets if term in (asset["name"] or "").upper()]
+    if not include_delisted:
+        assets = [asset for asset in assets if not asset["info"]["isDelisted"]]
     
-    if _assets_cache is None or (current_time - _cache_timestamp) > CACHE_DURATION:
-        try:
-            client = HyperliquidClient()
-            meta = client.info.meta()
-            
-            if meta and 'universe' in meta:
-                assets = [asset.get('name') for asset in meta['universe'] if asset.get('name')]
-                assets.sort()
-                
-                _assets_cache = assets
-                _cache_timestamp = current_time
-            else:
-                return []
-        except Exception as e:
-            print(f"Error fetching Hyperliquid assets: {e}")
-            return _assets_cache or []
-    
-    return _assets_cache
\ No newline at end of file
+    page = assets[offset:offset + limit] if limit is not None else assets[offset:]
+    return {
+        "total_assets": len(assets),
+        "offset": offset,
+        "limit": limit,
+        "assets": page
+    }
+
+def get_hyperliquid_assets() -> List[str]:
+    """Lista de ativos da Hyperliquid (cache compartilhado entre workers, fresco por 24h)"""
+    try:
+        return market_cache.get(
+            "hyperliquid_assets", _fetch_hyperliquid_assets,
+            fresh_seconds=HYPERLIQUID_ASSETS_CACHE_SECONDS, stale_seconds=HYPERLIQUID_ASSETS_STALE_SECONDS
+        )
+    except Exception as e:
+        print(f"Error fetching Hyperliquid assets: {e}")
+        return []
+
+def _fetch_hyperliquid_assets() -> List[str]:
+    meta = HyperliquidClient().info.meta()
+    return sorted(asset.get('name') for asset in meta.get('universe', []) if asset.get('name'))
@@ -8,11 +8,15 @@ from infrastructure.security import decrypt_data
 from application.services.quantity_calculator import extract_asset_from_symbol, calculate_quantity_multiplier
 from application.services.trade_analyzer import analyze_trade_intent
 from application.services.webhook_logger import create_webhook_log
-from infrastructure.external.hyperliquid_client import HyperliquidClient
+from infrastructure.external.hyperliquid_client import HyperliquidClient, invalidate_user_state
+from infrastructure.external.rate_limiter import Priority, set_api_priority
 
 def process_generic_webhook(payload: GenericWebhookPayload, request: Request, db: Session) -> Dict[str, Any]:
     """Processa webhook genérico que recebe todos os ativos numa única URL"""
     
+    # Chamadas à Hyperliquid deste fluxo (análise + ordem) passam na frente do dashboard
+    set_api_priority(Priority.HIGH)
+    
     # Serializar o payload para logs
     request_body = payload.model_dump_json()
     
@@ -90,18 +94,22 @@ def process_generic_webhook(payload: GenericWebhookPayload, request: Request, db
         print(f"Modo: {'🚀 REAL' if bool(config.is_live_trading) else '🔄 SIMULAÇÃO'}")
         
         # Executar ordem na Hyperliquid
-        result = client.place_order(
-            secret_key=secret_key,
-            asset_name=hyperliquid_asset,
-            is_buy=is_buy,
-            size=order_size,
-            limit_price=limit_price,
-            stop_loss=None,
-            take_profit=None,
-            comment=f"{user_info} | {trade_type}: {trade_details['description']}",
-            is_live_trading=bool(config.is_live_trading),
-            leverage=leverage_to_use
-        )
+        try:
+            result = client.place_order(
+                secret_key=secret_key,
+                asset_name=hyperliquid_asset,
+                is_buy=is_buy,
+                size=order_size,
+                limit_price=limit_price,
+                stop_loss=None,
+                take_profit=None,
+                comment=f"{user_info} | {trade_type}: {trade_details['description']}",
+                is_live_trading=bool(config.is_live_trading),
+                leverage=leverage_to_use
+            )
+        finally:
+            # A ordem (mesmo com erro) pode ter mudado posições e margem
+            invalidate_user_state(user.wallet.public_address)
         
         print(f"Resultado da Hyperliquid: {result}")
         
@@ -353,4 +361,5 @@ def _record_pnl_trade(db: Session, config: WebhookConfig, user_id: int, trading_
         
     except Exception as pnl_error:
         print(f"⚠️ Erro ao registrar trade no PNL: {pnl_error}")
-        # Não falhar o webhook por erro no PNL
\ No newline at end of file
+        # Não falhar o webhook por erro no PNL, mas liberar a sessão para o log do webhook
+        db.rollback()
\ No newline at end of file
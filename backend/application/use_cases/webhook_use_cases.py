@@ -1,9 +1,26 @@
 from typing import List, Optional
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_
 from domain.models import User, WebhookConfig, WebhookLog
-from domain.schemas import WebhookCreate, WebhookResponse, WebhookLogResponse
+from domain.schemas import WebhookCreate, WebhookResponse
+from infrastructure.pagination import keyset_page
+from infrastructure.services.dashboard_cache import touch_user_data
+
+# Colunas de WebhookLogResponse, selecionadas direto (sem carregar o objeto ORM)
+LOG_RESPONSE_COLUMNS = (
+    WebhookLog.id,
+    WebhookLog.timestamp,
+    WebhookLog.request_method,
+    WebhookLog.request_url,
+    WebhookLog.request_headers,
+    WebhookLog.request_body,
+    WebhookLog.response_status,
+    WebhookLog.response_headers,
+    WebhookLog.response_body,
+    WebhookLog.is_success,
+    WebhookLog.error_message
+)
 
 def create_webhook_config(user: User, webhook_data: WebhookCreate, db: Session) -> dict:
     """Cria uma nova configuração de webhook"""
@@ -32,6 +49,7 @@ def create_webhook_config(user: User, webhook_data: WebhookCreate, db: Session)
     )
     
     db.add(webhook_config)
+    touch_user_data(db, user.id)
     db.commit()
     db.refresh(webhook_config)
     
@@ -69,12 +87,13 @@ def delete_webhook(user: User, webhook_id: int, db: Session) -> dict:
         )
     
     db.delete(webhook)
+    touch_user_data(db, user.id)
     db.commit()
     
     return {"message": "Webhook removido com sucesso"}
 
-def get_webhook_logs(user: User, webhook_id: int, db: Session, limit: int = 50) -> List[WebhookLogResponse]:
-    """Obtém o histórico de logs de um webhook específico"""
+def get_webhook_logs(user: User, webhook_id: int, db: Session, limit: int = 50, cursor: Optional[str] = None) -> dict:
+    """Obtém o histórico de logs de um webhook específico (paginado por cursor)"""
     # Verificar se o webhook pertence ao usuário
     webhook = db.query(WebhookConfig).filter(
         and_(
@@ -90,54 +109,22 @@ def get_webhook_logs(user: User, webhook_id: int, db: Session, limit: int = 50)
         )
     
     # Buscar logs
-    logs = db.query(WebhookLog).filter(
-        WebhookLog.webhook_config_id == webhook_id
-    ).order_by(desc(WebhookLog.timestamp)).limit(limit).all()
+    query = db.query(*LOG_RESPONSE_COLUMNS).filter(WebhookLog.webhook_config_id == webhook_id)
+    rows, next_cursor = keyset_page(query, WebhookLog.timestamp, WebhookLog.id, cursor, limit)
     
-    return [
-        WebhookLogResponse(
-            id=log.id,
-            timestamp=log.timestamp.isoformat(),
-            request_method=log.request_method,
-            request_url=log.request_url,
-            request_headers=log.request_headers,
-            request_body=log.request_body,
-            response_status=log.response_status,
-            response_headers=log.response_headers,
-            response_body=log.response_body,
-            is_success=log.is_success,
-            error_message=log.error_message
-        )
-        for log in logs
-    ]
+    return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
 
-def get_all_webhook_logs(user: User, db: Session, limit: int = 100) -> List[WebhookLogResponse]:
-    """Obtém o histórico de logs de todos os webhooks do usuário"""
+def get_all_webhook_logs(user: User, db: Session, limit: int = 100, cursor: Optional[str] = None) -> dict:
+    """Obtém o histórico de logs de todos os webhooks do usuário (paginado por cursor)"""
     # Buscar todos os webhooks do usuário
     webhook_ids = db.query(WebhookConfig.id).filter(WebhookConfig.user_id == user.id).all()
     webhook_ids = [w[0] for w in webhook_ids]
     
     if not webhook_ids:
-        return []
+        return {"items": [], "next_cursor": None}
     
     # Buscar logs
-    logs = db.query(WebhookLog).filter(
-        WebhookLog.webhook_config_id.in_(webhook_ids)
-    ).order_by(desc(WebhookLog.timestamp)).limit(limit).all()
+    query = db.query(*LOG_RESPONSE_COLUMNS).filter(WebhookLog.webhook_config_id.in_(webhook_ids))
+    rows, next_cursor = keyset_page(query, WebhookLog.timestamp, WebhookLog.id, cursor, limit)
     
-    return [
-        WebhookLogResponse(
-            id=log.id,
-            timestamp=log.timestamp.isoformat(),
-            request_method=log.request_method,
-            request_url=log.request_url,
-            request_headers=log.request_headers,
-            request_body=log.request_body,
-            response_status=log.response_status,
-            response_headers=log.response_headers,
-            response_body=log.response_body,
-            is_success=log.is_success,
-            error_message=log.error_message
-        )
-        for log in logs
-    ]
\ No newline at end of file
+    return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
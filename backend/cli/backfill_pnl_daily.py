@@ -0,0 +1,33 @@
+"""
+Backfill da tabela pnl_daily a partir de webhook_trades/webhook_positions
+
+Uso (a partir de backend/):
+    python -m cli.backfill_pnl_daily
+    python -m cli.backfill_pnl_daily --user-id 3 --asset BTC
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+from infrastructure.database import SessionLocal
+from infrastructure.services.pnl_rollup import PnlRollup
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reconstrói o rollup diário de PNL")
+    parser.add_argument("--user-id", type=int, action="append", default=[], help="Filtrar por ID de usuário (repetível)")
+    parser.add_argument("--asset", action="append", default=[], help="Filtrar por ativo (repetível)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        total = PnlRollup(db).backfill(user_ids=args.user_id, assets=args.asset)
+    finally:
+        db.close()
+
+    print(f"✅ pnl_daily reconstruído para {total} pares (usuário, ativo)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
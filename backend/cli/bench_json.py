@@ -0,0 +1,135 @@
+"""
+Benchmark da serialização de listas grandes (trades)
+
+Uso (a partir de backend/):
+    python -m cli.bench_json                     # 100, 1.000 e 10.000 linhas
+    python -m cli.bench_json --rows 500 5000 --repeat 10
+
+Compara, sobre um SQLite em memória com o mesmo schema:
+  - orm+pydantic: objetos ORM -> WebhookTradeResponse -> validação/serialização do response_model
+  - rows+orjson:  colunas selecionadas -> dicts -> orjson (caminho usado pelas rotas de lista)
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from infrastructure.database import Base
+from domain.models import User, WebhookConfig, WebhookTrade
+from domain.schemas import WebhookTradeResponse
+
+TRADE_COLUMNS = (
+    WebhookTrade.id,
+    WebhookTrade.webhook_config_id,
+    WebhookTrade.asset_name.label("trading_view_symbol"),
+    WebhookTrade.trade_type,
+    WebhookTrade.side,
+    WebhookTrade.quantity,
+    WebhookTrade.price,
+    WebhookTrade.usd_value,
+    WebhookTrade.leverage,
+    WebhookTrade.timestamp,
+    WebhookTrade.order_id,
+    WebhookTrade.fees,
+)
+
+_trades_adapter = TypeAdapter(List[WebhookTradeResponse])
+
+
+def _seed(db: Session, rows: int) -> int:
+    user = User(email="bench@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    config = WebhookConfig(user_id=user.id, trading_view_symbol="BTC", max_usd_value=100, leverage=1)
+    db.add(config)
+    db.flush()
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db.bulk_insert_mappings(WebhookTrade, [
+        {
+            "webhook_config_id": config.id,
+            "user_id": user.id,
+            "asset_name": "BTC",
+            "trade_type": "BUY" if i % 2 == 0 else "CLOSE",
+            "side": "LONG",
+            "quantity": 0.01 + i * 1e-6,
+            "price": 40000.0 + i,
+            "usd_value": 400.0 + i * 0.01,
+            "leverage": 3,
+            "order_id": str(1000000 + i),
+            "fees": 0.15,
+            "timestamp": start + timedelta(seconds=i),
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+    return user.id
+
+
+def orm_pydantic(db: Session, user_id: int) -> bytes:
+    trades = db.query(WebhookTrade).filter(WebhookTrade.user_id == user_id).all()
+    items = [
+        WebhookTradeResponse(
+            id=trade.id,
+            webhook_config_id=trade.webhook_config_id,
+            trading_view_symbol=trade.asset_name,
+            trade_type=trade.trade_type,
+            side=trade.side,
+            quantity=trade.quantity,
+            price=trade.price,
+            usd_value=trade.usd_value,
+            leverage=trade.leverage,
+            order_id=trade.order_id,
+            fees=trade.fees,
+            timestamp=trade.timestamp.isoformat()
+        )
+        for trade in trades
+    ]
+    # O que o FastAPI faz com response_model: valida de novo e serializa
+    return _trades_adapter.dump_json(_trades_adapter.validate_python(items))
+
+
+def rows_orjson(db: Session, user_id: int) -> bytes:
+    rows = db.query(*TRADE_COLUMNS).filter(WebhookTrade.user_id == user_id).all()
+    return orjson.dumps([row._asdict() for row in rows], option=orjson.OPT_NON_STR_KEYS)
+
+
+def _best_of(fn: Callable[[], bytes], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da serialização de listas de trades")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000], help="Tamanhos de lista")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições por medida (vale a melhor)")
+    args = parser.parse_args(argv)
+
+    print(f"{'linhas':>8} {'orm+pydantic':>14} {'rows+orjson':>13} {'ganho':>7}")
+    for rows in args.rows:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            user_id = _seed(db, rows)
+            assert len(orjson.loads(rows_orjson(db, user_id))) == rows
+
+            slow = _best_of(lambda: orm_pydantic(db, user_id), args.repeat)
+            fast = _best_of(lambda: rows_orjson(db, user_id), args.repeat)
+            print(f"{rows:>8} {slow * 1000:>12.2f}ms {fast * 1000:>11.2f}ms {slow / fast:>6.1f}x")
+        engine.dispose()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,418 @@
+"""
+Servidor local que imita a API da Hyperliquid (testes, carga e profiling sem mainnet)
+
+Uso (a partir de backend/):
+    python -m cli.fake_hyperliquid                                   # porta 5055
+    python -m cli.fake_hyperliquid --latency-ms 80 --jitter-ms 40 --error-rate 0.02 --error-status 429
+    python -m cli.fake_hyperliquid --extra-assets 300 --frozen-prices
+
+e aponte a API para ele:
+    HYPERLIQUID_API_URL=http://127.0.0.1:5055 uvicorn app:app
+
+Implementa:
+  POST /info      meta, spotMeta, allMids, metaAndAssetCtxs, clearinghouseState, candleSnapshot, l2Book
+  POST /exchange  order (IoC/Gtc), updateLeverage
+  GET  /_stats    requisições por tipo, erros injetados, contas
+  POST /_control  altera latency_ms, jitter_ms, error_rate, error_status e prices em tempo de execução
+  POST /_reset    zera contas e contadores
+
+Determinismo: preços seguem uma senoide por ativo (ou ficam fixos com --frozen-prices);
+ordens IoC preenchem no mid se o preço limite cruza, senão retornam o mesmo erro de
+"could not immediately match" da Hyperliquid; latência e erros vêm de um Random com seed.
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+BASE_ASSETS = [
+    # nome, szDecimals, maxLeverage, preço base
+    ("BTC", 5, 40, 65000.0),
+    ("ETH", 4, 25, 3200.0),
+    ("SOL", 2, 20, 150.0),
+    ("DOGE", 0, 10, 0.15),
+    ("HYPE", 2, 10, 25.0),
+]
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "8h": 28_800_000,
+    "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
+MAX_CANDLES = 5000
+STARTING_BALANCE = 10_000.0
+PRICE_AMPLITUDE = 0.02
+PRICE_PERIOD_SECONDS = 3600.0
+
+
+class FakeExchangeState:
+    """Preços, contas e contadores do servidor (protegidos por lock; as rotas rodam em threads)"""
+
+    def __init__(self, extra_assets: int = 0, frozen_prices: bool = False, seed: int = 42):
+        self.assets = list(BASE_ASSETS) + [
+            (f"TKN{i}", 1, 5, round(1.0 + (i * 7919 % 1000) / 10, 2)) for i in range(extra_assets)
+        ]
+        self.asset_index = {name: index for index, (name, *_rest) in enumerate(self.assets)}
+        self.frozen_prices = frozen_prices
+        self.seed = seed
+        self.price_overrides: Dict[str, float] = {}
+        self.latency_ms = 0.0
+        self.jitter_ms = 0.0
+        self.error_rate = 0.0
+        self.error_status = 500
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.random = random.Random(self.seed)
+            self.positions: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+            self.balances: Dict[str, float] = defaultdict(lambda: STARTING_BALANCE)
+            self.leverage: Dict[tuple, Dict] = {}
+            self.next_oid = 1_000_000
+            self.requests = Counter()
+            self.injected_errors = Counter()
+
+    # --- preços -------------------------------------------------------------------------
+
+    def price(self, name: str, at_ms: Optional[int] = None) -> float:
+        if name in self.price_overrides:
+            return self.price_overrides[name]
+        index = self.asset_index[name]
+        base = self.assets[index][3]
+        if self.frozen_prices:
+            return base
+        seconds = (at_ms if at_ms is not None else time.time() * 1000) / 1000
+        phase = index * 0.7
+        return base * (1 + PRICE_AMPLITUDE * math.sin(2 * math.pi * seconds / PRICE_PERIOD_SECONDS + phase))
+
+    def mids(self) -> Dict[str, str]:
+        return {name: _fmt(self.price(name)) for name, *_rest in self.assets}
+
+    # --- info ---------------------------------------------------------------------------
+
+    def meta(self) -> Dict:
+        return {
+            "universe": [
+                {"name": name, "szDecimals": sz_decimals, "maxLeverage": max_leverage}
+                for name, sz_decimals, max_leverage, _base in self.assets
+            ]
+        }
+
+    def meta_and_asset_ctxs(self) -> List:
+        now_ms = int(time.time() * 1000)
+        contexts = []
+        for name, _sz, _lev, base in self.assets:
+            mark = self.price(name)
+            contexts.append({
+                "funding": "0.0000125",
+                "openInterest": _fmt(base * 1000 / mark),
+                "prevDayPx": _fmt(self.price(name, now_ms - 86_400_000)),
+                "dayNtlVlm": _fmt(base * 50_000),
+                "premium": "0.0",
+                "oraclePx": _fmt(mark),
+                "markPx": _fmt(mark),
+                "midPx": _fmt(mark),
+                "impactPxs": [_fmt(mark * 0.9999), _fmt(mark * 1.0001)]
+            })
+        return [self.meta(), contexts]
+
+    def clearinghouse_state(self, user: str) -> Dict:
+        user = user.lower()
+        with self._lock:
+            positions = {coin: dict(position) for coin, position in self.positions[user].items()}
+            balance = self.balances[user]
+
+        asset_positions = []
+        total_ntl = 0.0
+        total_margin = 0.0
+        total_unrealized = 0.0
+        for coin, position in positions.items():
+            mark = self.price(coin)
+            size = position["szi"]
+            entry = position["entryPx"]
+            leverage = position["leverage"]
+            value = abs(size) * mark
+            unrealized = size * (mark - entry)
+            margin = value / leverage
+            total_ntl += value
+            total_margin += margin
+            total_unrealized += unrealized
+            side = 1 if size > 0 else -1
+            asset_positions.append({
+                "type": "oneWay",
+                "position": {
+                    "coin": coin,
+                    "szi": _fmt(size),
+                    "entryPx": _fmt(entry),
+                    "positionValue": _fmt(value),
+                    "unrealizedPnl": _fmt(unrealized),
+                    "returnOnEquity": _fmt(unrealized / margin if margin else 0.0),
+                    "liquidationPx": _fmt(entry * (1 - side / leverage)),
+                    "marginUsed": _fmt(margin),
+                    "maxLeverage": self.assets[self.asset_index[coin]][2],
+                    "leverage": {"type": "cross", "value": leverage}
+                }
+            })
+
+        account_value = balance + total_unrealized
+        summary = {
+            "accountValue": _fmt(account_value),
+            "totalNtlPos": _fmt(total_ntl),
+            "totalRawUsd": _fmt(balance),
+            "totalMarginUsed": _fmt(total_margin)
+        }
+        return {
+            "assetPositions": asset_positions,
+            "marginSummary": summary,
+            "crossMarginSummary": summary,
+            "crossMaintenanceMarginUsed": _fmt(total_margin / 2),
+            "withdrawable": _fmt(max(account_value - total_margin, 0.0)),
+            "time": int(time.time() * 1000)
+        }
+
+    def candles(self, request: Dict) -> List[Dict]:
+        coin = request["coin"]
+        interval = request["interval"]
+        step = INTERVAL_MS[interval]
+        start = request["startTime"] - request["startTime"] % step
+        end = request.get("endTime") or int(time.time() * 1000)
+        opens = range(start, end + 1, step)
+        if len(opens) > MAX_CANDLES:
+            opens = opens[-MAX_CANDLES:]
+
+        candles = []
+        for open_time in opens:
+            close_time = open_time + step - 1
+            samples = [self.price(coin, open_time + step * k // 4) for k in range(5)]
+            candles.append({
+                "t": open_time,
+                "T": close_time,
+                "s": coin,
+                "i": interval,
+                "o": _fmt(samples[0]),
+                "c": _fmt(samples[-1]),
+                "h": _fmt(max(samples)),
+                "l": _fmt(min(samples)),
+                "v": _fmt(1000.0 / samples[0]),
+                "n": 100
+            })
+        return candles
+
+    def l2_book(self, coin: str, levels: int = 20) -> Dict:
+        mid = self.price(coin)
+        tick = mid * 0.0001
+        bids = [{"px": _fmt(mid - tick * (i + 1)), "sz": _fmt(1.0 + i), "n": 1 + i % 3} for i in range(levels)]
+        asks = [{"px": _fmt(mid + tick * (i + 1)), "sz": _fmt(1.0 + i), "n": 1 + i % 3} for i in range(levels)]
+        return {"coin": coin, "time": int(time.time() * 1000), "levels": [bids, asks]}
+
+    # --- exchange -----------------------------------------------------------------------
+
+    def update_leverage(self, user: str, action: Dict) -> Dict:
+        coin = self.assets[action["asset"]][0]
+        with self._lock:
+            self.leverage[(user, coin)] = {"value": action["leverage"], "isCross": action.get("isCross", True)}
+        return {"status": "ok", "response": {"type": "default"}}
+
+    def orders(self, user: str, action: Dict) -> Dict:
+        statuses = [self._order(user, order) for order in action.get("orders", [])]
+        return {"status": "ok", "response": {"type": "order", "data": {"statuses": statuses}}}
+
+    def _order(self, user: str, order: Dict) -> Dict:
+        asset = order["a"]
+        if asset >= len(self.assets):
+            return {"error": f"Invalid asset {asset}"}
+        coin = self.assets[asset][0]
+        is_buy = order["b"]
+        limit_px = float(order["p"])
+        size = float(order["s"])
+        mid = self.price(coin)
+        crosses = limit_px >= mid if is_buy else limit_px <= mid
+
+        with self._lock:
+            self.next_oid += 1
+            oid = self.next_oid
+            if not crosses:
+                if "limit" in order["t"] and order["t"]["limit"].get("tif") == "Ioc":
+                    return {"error": f"Order could not immediately match against any resting orders. asset={asset}"}
+                return {"resting": {"oid": oid}}
+            self._apply_fill(user, coin, size if is_buy else -size, mid, bool(order.get("r")))
+        return {"filled": {"totalSz": _fmt(size), "avgPx": _fmt(mid), "oid": oid}}
+
+    def _apply_fill(self, user: str, coin: str, signed_size: float, price: float, reduce_only: bool):
+        """Posição líquida por ativo (modo one-way); PnL realizado vai para o saldo"""
+        positions = self.positions[user]
+        leverage = self.leverage.get((user, coin), {}).get("value", 1)
+        current = positions.get(coin)
+        if current is None:
+            if reduce_only:
+                return
+            positions[coin] = {"szi": signed_size, "entryPx": price, "leverage": leverage}
+            return
+
+        size = current["szi"]
+        if size * signed_size > 0:
+            if reduce_only:
+                return
+            new_size = size + signed_size
+            current["entryPx"] = (current["entryPx"] * abs(size) + price * abs(signed_size)) / abs(new_size)
+            current["szi"] = new_size
+            return
+
+        closed = min(abs(size), abs(signed_size))
+        self.balances[user] += closed * (price - current["entryPx"]) * (1 if size > 0 else -1)
+        remaining = size + signed_size
+        if abs(remaining) < 1e-12:
+            del positions[coin]
+        elif remaining * size > 0:
+            current["szi"] = remaining
+        elif not reduce_only:
+            positions[coin] = {"szi": remaining, "entryPx": price, "leverage": leverage}
+        else:
+            del positions[coin]
+
+    # --- falhas injetadas ---------------------------------------------------------------
+
+    def draw_delay_and_error(self) -> tuple:
+        with self._lock:
+            delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+            fail = self.error_rate > 0 and self.random.random() < self.error_rate
+        return delay / 1000, fail
+
+
+def create_app(state: FakeExchangeState) -> FastAPI:
+    app = FastAPI(title="Fake Hyperliquid")
+
+    async def _maybe_fail(kind: str) -> Optional[JSONResponse]:
+        state.requests[kind] += 1
+        delay, fail = state.draw_delay_and_error()
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            state.injected_errors[kind] += 1
+            if 400 <= state.error_status < 500:
+                return JSONResponse(status_code=state.error_status, content={"code": None, "msg": "injected error"})
+            return JSONResponse(status_code=state.error_status, content="injected error")
+        return None
+
+    @app.post("/info")
+    async def info(request: Request):
+        body = await request.json()
+        request_type = body.get("type")
+        failure = await _maybe_fail(f"info.{request_type}")
+        if failure is not None:
+            return failure
+
+        if request_type == "meta":
+            return state.meta()
+        if request_type == "spotMeta":
+            return {"universe": [], "tokens": []}
+        if request_type == "allMids":
+            return state.mids()
+        if request_type == "metaAndAssetCtxs":
+            return state.meta_and_asset_ctxs()
+        if request_type == "clearinghouseState":
+            return state.clearinghouse_state(body["user"])
+        if request_type == "candleSnapshot":
+            return state.candles(body["req"])
+        if request_type == "l2Book":
+            return state.l2_book(body["coin"])
+        return JSONResponse(status_code=422, content={"code": None, "msg": f"Tipo de info não suportado: {request_type}"})
+
+    @app.post("/exchange")
+    async def exchange(request: Request):
+        body = await request.json()
+        action = body.get("action", {})
+        failure = await _maybe_fail(f"exchange.{action.get('type')}")
+        if failure is not None:
+            return failure
+
+        user = _signer(body)
+        if action.get("type") == "order":
+            return state.orders(user, action)
+        if action.get("type") == "updateLeverage":
+            return state.update_leverage(user, action)
+        return {"status": "err", "response": f"Ação não suportada: {action.get('type')}"}
+
+    @app.get("/_stats")
+    def stats():
+        return {
+            "requests": dict(state.requests),
+            "injected_errors": dict(state.injected_errors),
+            "accounts": {user: list(positions) for user, positions in state.positions.items()},
+            "latency_ms": state.latency_ms,
+            "jitter_ms": state.jitter_ms,
+            "error_rate": state.error_rate,
+            "error_status": state.error_status
+        }
+
+    @app.post("/_control")
+    async def control(request: Request):
+        body = await request.json()
+        for field in ("latency_ms", "jitter_ms", "error_rate", "error_status"):
+            if field in body:
+                setattr(state, field, type(getattr(state, field))(body[field]))
+        if "prices" in body:
+            state.price_overrides.update({name: float(price) for name, price in body["prices"].items()})
+        return stats()
+
+    @app.post("/_reset")
+    def reset():
+        state.reset()
+        state.price_overrides.clear()
+        return {"status": "ok"}
+
+    return app
+
+
+def _signer(body: Dict) -> str:
+    """Endereço que assinou a ação (mesma recuperação que a Hyperliquid faz; assinatura de testnet)"""
+    try:
+        from hyperliquid.utils.signing import recover_agent_or_user_from_l1_action
+        return recover_agent_or_user_from_l1_action(
+            body["action"], body["signature"], body.get("vaultAddress"),
+            body["nonce"], body.get("expiresAfter"), False
+        ).lower()
+    except Exception:
+        return "0x0000000000000000000000000000000000000000"
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.6f}".rstrip("0").rstrip(".") or "0"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API da Hyperliquid")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência fixa por requisição")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Latência extra aleatória (0..jitter)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de requisições que falham")
+    parser.add_argument("--error-status", type=int, default=500, help="Status HTTP dos erros injetados (ex: 429)")
+    parser.add_argument("--extra-assets", type=int, default=0, help="Ativos sintéticos além de BTC/ETH/SOL/DOGE/HYPE")
+    parser.add_argument("--frozen-prices", action="store_true", help="Preços fixos (sem senoide)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    state = FakeExchangeState(extra_assets=args.extra_assets, frozen_prices=args.frozen_prices, seed=args.seed)
+    state.latency_ms = args.latency_ms
+    state.jitter_ms = args.jitter_ms
+    state.error_rate = args.error_rate
+    state.error_status = args.error_status
+
+    import uvicorn
+    print(f"🧪 Hyperliquid falsa em http://{args.host}:{args.port} ({len(state.assets)} ativos)")
+    uvicorn.run(create_app(state), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Rebuild de PNL para todos os usuários (ou um subconjunto)
+
+Uso (a partir de backend/):
+    python -m cli.rebuild_pnl                       # todos os usuários
+    python -m cli.rebuild_pnl --user-id 3 --asset BTC
+    python -m cli.rebuild_pnl --dry-run             # mostra o diff sem gravar
+    python -m cli.rebuild_pnl --checkpoint rebuild.ckpt   # retomável
+
+O trabalho é particionado por (usuário, ativo) e distribuído num pool de processos.
+Cada partição roda na sua própria transação, então uma falha não afeta as demais.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from infrastructure.database import SessionLocal, engine
+from domain.models import User, WebhookTrade, WebhookPnlSummary
+from infrastructure.services.pnl_calculator import PnlCalculator
+
+SUMMARY_FIELDS = [
+    "total_trades", "winning_trades", "losing_trades",
+    "total_realized_pnl", "total_unrealized_pnl", "total_fees", "net_pnl",
+    "win_rate", "avg_win", "avg_loss", "largest_win", "largest_loss", "total_volume",
+]
+
+Partition = Tuple[int, str]
+
+
+def _init_worker():
+    """Descarta conexões herdadas do processo pai (não podem ser compartilhadas após o fork)"""
+    engine.dispose(close=False)
+
+
+def _summary_state(db: Session, user_id: int, asset_name: str) -> Optional[Dict]:
+    summary = db.query(WebhookPnlSummary).filter(
+        and_(
+            WebhookPnlSummary.user_id == user_id,
+            WebhookPnlSummary.asset_name == asset_name
+        )
+    ).first()
+
+    if not summary:
+        return None
+
+    return {field: getattr(summary, field) for field in SUMMARY_FIELDS}
+
+
+def _diff_summaries(before: Optional[Dict], after: Optional[Dict]) -> Dict:
+    before = before or {}
+    after = after or {}
+    changes = {}
+    for field in SUMMARY_FIELDS:
+        old, new = before.get(field), after.get(field)
+        if isinstance(old, float) and isinstance(new, float) and abs(old - new) < 1e-9:
+            continue
+        if old != new:
+            changes[field] = (old, new)
+    return changes
+
+
+def rebuild_partition(user_id: int, asset_name: str, dry_run: bool = False, verbose: bool = False) -> Dict:
+    """
+    Recalcula o PNL de uma partição (usuário, ativo)
+    Em dry-run tudo roda dentro de uma transação externa que é desfeita no final,
+    e os commits do PnlCalculator viram savepoints.
+    """
+    started = time.monotonic()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+    if dry_run:
+        connection = engine.connect()
+        transaction = connection.begin()
+        db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    else:
+        connection = None
+        transaction = None
+        db = SessionLocal()
+
+    try:
+        before = _summary_state(db, user_id, asset_name)
+        with output:
+            PnlCalculator(db).recalculate_asset_pnl(user_id, asset_name)
+        after = _summary_state(db, user_id, asset_name)
+
+        if transaction is not None:
+            transaction.rollback()
+    except Exception:
+        if transaction is not None:
+            transaction.rollback()
+        else:
+            db.rollback()
+        raise
+    finally:
+        db.close()
+        if connection is not None:
+            connection.close()
+
+    return {
+        "user_id": user_id,
+        "asset_name": asset_name,
+        "changes": _diff_summaries(before, after),
+        "elapsed": time.monotonic() - started,
+    }
+
+
+def _list_partitions(user_ids: List[int], emails: List[str], assets: List[str]) -> List[Partition]:
+    db = SessionLocal()
+    try:
+        query = db.query(WebhookTrade.user_id, WebhookTrade.asset_name).distinct()
+
+        if emails:
+            email_ids = [row[0] for row in db.query(User.id).filter(User.email.in_(emails)).all()]
+            user_ids = list(user_ids) + email_ids
+            if not user_ids:
+                return []
+        if user_ids:
+            query = query.filter(WebhookTrade.user_id.in_(user_ids))
+        if assets:
+            query = query.filter(WebhookTrade.asset_name.in_(assets))
+
+        return sorted((user_id, asset_name) for user_id, asset_name in query.all())
+    finally:
+        db.close()
+
+
+def _checkpoint_key(user_id: int, asset_name: str) -> str:
+    return f"{user_id}\t{asset_name}"
+
+
+def _load_checkpoint(path: Optional[str]) -> Set[str]:
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def _format_changes(changes: Dict) -> str:
+    return ", ".join(f"{field}: {old} → {new}" for field, (old, new) in changes.items())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recalcula o PNL de todos os usuários em paralelo")
+    parser.add_argument("--user-id", type=int, action="append", default=[], help="Filtrar por ID de usuário (repetível)")
+    parser.add_argument("--email", action="append", default=[], help="Filtrar por email de usuário (repetível)")
+    parser.add_argument("--asset", action="append", default=[], help="Filtrar por ativo (repetível)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Número de processos")
+    parser.add_argument("--dry-run", action="store_true", help="Reporta resumos alterados sem gravar nada")
+    parser.add_argument("--checkpoint", help="Arquivo de checkpoint; partições já concluídas são puladas")
+    parser.add_argument("--verbose", action="store_true", help="Mostra os logs do PnlCalculator")
+    args = parser.parse_args(argv)
+
+    partitions = _list_partitions(args.user_id, args.email, args.asset)
+
+    # Checkpoint só faz sentido quando gravamos; dry-run sempre passa por tudo
+    done = set() if args.dry_run else _load_checkpoint(args.checkpoint)
+    pending = [p for p in partitions if _checkpoint_key(*p) not in done]
+    skipped = len(partitions) - len(pending)
+
+    mode = "DRY-RUN" if args.dry_run else "REBUILD"
+    print(f"🔄 {mode}: {len(pending)} partições (usuário, ativo), {skipped} já concluídas, {args.workers} workers", file=sys.stderr)
+
+    if not pending:
+        return 0
+
+    checkpoint_file = open(args.checkpoint, "a", encoding="utf-8") if args.checkpoint and not args.dry_run else None
+    failures = 0
+    changed = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(rebuild_partition, user_id, asset_name, args.dry_run, args.verbose): (user_id, asset_name)
+                for user_id, asset_name in pending
+            }
+
+            for index, future in enumerate(as_completed(futures), start=1):
+                user_id, asset_name = futures[future]
+                prefix = f"[{index}/{len(pending)}] user={user_id} asset={asset_name}"
+
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failures += 1
+                    print(f"{prefix} ❌ {e}", file=sys.stderr)
+                    continue
+
+                if result["changes"]:
+                    changed += 1
+                    print(f"{prefix} Δ {_format_changes(result['changes'])}")
+
+                print(f"{prefix} ✅ {result['elapsed']:.2f}s", file=sys.stderr)
+
+                if checkpoint_file:
+                    checkpoint_file.write(_checkpoint_key(user_id, asset_name) + "\n")
+                    checkpoint_file.flush()
+    finally:
+        if checkpoint_file:
+            checkpoint_file.close()
+
+    print(f"✅ {mode} concluído: {changed} resumos alterados, {failures} falhas", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
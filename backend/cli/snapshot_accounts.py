@@ -0,0 +1,36 @@
+"""
+Snapshot das contas a partir do user_state da Hyperliquid
+
+Uso (a partir de backend/):
+    python -m cli.snapshot_accounts                    # uma passada em todas as carteiras
+    python -m cli.snapshot_accounts --user-id 1 2      # só esses usuários
+    python -m cli.snapshot_accounts --loop             # repete a cada SNAPSHOT_INTERVAL_SECONDS
+
+Útil para rodar por cron quando SNAPSHOT_WORKER_ENABLED está desligado na API.
+"""
+import argparse
+import sys
+import time
+
+from config import SNAPSHOT_INTERVAL_SECONDS, SNAPSHOT_MAX_CONCURRENCY
+from infrastructure.services.account_snapshots import AccountSnapshotWorker
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Grava snapshots das contas (saldo, margem, PnL não realizado)")
+    parser.add_argument("--user-id", type=int, nargs="+", help="Restringe aos usuários informados")
+    parser.add_argument("--loop", action="store_true", help="Executa continuamente")
+    parser.add_argument("--interval", type=float, default=SNAPSHOT_INTERVAL_SECONDS, help="Intervalo do --loop em segundos")
+    parser.add_argument("--concurrency", type=int, default=SNAPSHOT_MAX_CONCURRENCY, help="Chamadas simultâneas à Hyperliquid")
+    args = parser.parse_args(argv)
+
+    worker = AccountSnapshotWorker(max_concurrency=args.concurrency)
+    while True:
+        worker.run_once(args.user_id)
+        if not args.loop:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Text, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from infrastructure.database import Base
@@ -12,6 +12,9 @@ class User(Base):
     # UUID para URLs públicas e segredo para webhooks
     uuid = Column(String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
     webhook_secret = Column(String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
+    # Versão dos dados do usuário (trades, posições, PNL, webhooks) para ETag/Last-Modified
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+    data_updated_at = Column(DateTime, nullable=True)
     
     wallet = relationship("Wallet", back_populates="user", uselist=False, cascade="all, delete-orphan")
     webhooks = relationship("WebhookConfig", back_populates="user", cascade="all, delete-orphan")
@@ -52,6 +55,11 @@ class WebhookLog(Base):
     error_message = Column(String(255), nullable=True)
     webhook_config = relationship("WebhookConfig", back_populates="logs")
 
+    __table_args__ = (
+        # Paginação por cursor (timestamp, id)
+        Index("ix_webhook_log_config_timestamp_id", "webhook_config_id", "timestamp", "id"),
+    )
+
 # Modelos para Sistema de PNL
 class WebhookTrade(Base):
     __tablename__ = "webhook_trades"
@@ -71,6 +79,12 @@ class WebhookTrade(Base):
     webhook_config = relationship("WebhookConfig")
     user = relationship("User")
 
+    __table_args__ = (
+        # Agregações por período (get_pnl_by_period) e paginação por cursor (timestamp, id)
+        Index("ix_webhook_trades_user_timestamp_id", "user_id", "timestamp", "id"),
+        Index("ix_webhook_trades_user_asset_timestamp_id", "user_id", "asset_name", "timestamp", "id"),
+    )
+
 class WebhookPosition(Base):
     __tablename__ = "webhook_positions"
     id = Column(Integer, primary_key=True, index=True)
@@ -92,6 +106,13 @@ class WebhookPosition(Base):
     webhook_config = relationship("WebhookConfig")
     user = relationship("User")
 
+    __table_args__ = (
+        # PNL realizado por período (get_pnl_by_period)
+        Index("ix_webhook_positions_user_closed_at", "user_id", "closed_at"),
+        # Histórico de posições do ativo paginado por cursor (opened_at, id)
+        Index("ix_webhook_positions_user_asset_opened_at_id", "user_id", "asset_name", "opened_at", "id"),
+    )
+
 class WebhookPnlSummary(Base):
     __tablename__ = "webhook_pnl_summary"
     id = Column(Integer, primary_key=True, index=True)
@@ -113,6 +134,44 @@ class WebhookPnlSummary(Base):
     last_updated = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     user = relationship("User")
 
+class PnlDaily(Base):
+    """Rollup diário de PNL por (usuário, ativo, dia UTC)"""
+    __tablename__ = "pnl_daily"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    asset_name = Column(String(20), nullable=False)
+    day = Column(Date, nullable=False)
+    realized_pnl = Column(Float, default=0.0)  # posições fechadas no dia
+    fees = Column(Float, default=0.0)
+    volume = Column(Float, default=0.0)
+    trade_count = Column(Integer, default=0)
+    winning_trades = Column(Integer, default=0)
+    losing_trades = Column(Integer, default=0)
+    last_updated = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    user = relationship("User")
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "asset_name", "day", name="uq_pnl_daily_user_asset_day"),
+        Index("ix_pnl_daily_user_day", "user_id", "day"),
+    )
+
+class Candle(Base):
+    """Candle OHLCV por (ativo, intervalo), preenchido a partir dos snapshots da Hyperliquid"""
+    __tablename__ = "candles"
+    id = Column(Integer, primary_key=True, index=True)
+    asset_name = Column(String(20), nullable=False)
+    interval = Column(String(5), nullable=False)  # 1m, 5m, 15m, 1h, 4h, 1d
+    open_time = Column(DateTime, nullable=False)  # UTC
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(Float, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("asset_name", "interval", "open_time", name="uq_candles_asset_interval_open_time"),
+    )
+
 class AccountSnapshot(Base):
     __tablename__ = "account_snapshots"
     id = Column(Integer, primary_key=True, index=True)
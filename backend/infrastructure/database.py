@@ -1,9 +1,53 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
-from config import DB_CONNECTION_STRING
+from sqlalchemy.pool import NullPool
+from config import (
+    DB_CONNECTION_STRING, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS, DB_PGBOUNCER_MODE
+)
+from infrastructure.db_pool import InstrumentedQueuePool, instrument_engine
+
+def _engine_options(url: str) -> dict:
+    """
+    Opções do pool a partir do config.py
+    Postgres direto: pool próprio (tamanho ligado ao threadpool), pre-ping, recycle e
+    statement_timeout na conexão. PgBouncer (modo transação): o PgBouncer faz o pool,
+    então NullPool e statement_timeout com SET LOCAL a cada transação.
+    """
+    parsed_url = make_url(url)
+    is_postgres = parsed_url.get_backend_name() == "postgresql"
+    if is_postgres and DB_PGBOUNCER_MODE:
+        options = {"poolclass": NullPool}
+        if parsed_url.get_dialect().driver == "psycopg":
+            # psycopg 3 prepara statements repetidos no servidor, o que quebra no modo transação
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": DB_POOL_PRE_PING
+    }
+    if is_postgres and DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
 
 # Database Engine
-engine = create_engine(DB_CONNECTION_STRING)
+engine = create_engine(DB_CONNECTION_STRING, **_engine_options(DB_CONNECTION_STRING))
+instrument_engine(engine)
+
+if DB_PGBOUNCER_MODE and DB_STATEMENT_TIMEOUT_MS > 0 and engine.dialect.name == "postgresql":
+    # PgBouncer não repassa "options" na conexão e um SET comum vazaria para outros clientes
+    @event.listens_for(engine, "begin")
+    def _set_statement_timeout(connection):
+        cursor = connection.connection.dbapi_connection.cursor()
+        cursor.execute(f"SET LOCAL statement_timeout = {DB_STATEMENT_TIMEOUT_MS}")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -13,4 +57,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
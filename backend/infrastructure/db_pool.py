@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Amostras de espera no checkout usadas nos percentis
+WAIT_SAMPLES = 1000
+# Esperas acima disto contam como "esperou por conexão" (pool saturado)
+WAIT_THRESHOLD_MS = 1.0
+
+class PoolMetrics:
+    """Contadores do pool: tempo de espera no checkout, timeouts, conexões abertas e invalidadas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits_ms: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.checkouts = 0
+        self.waited = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.max_wait_ms = 0.0
+        self.peak_checked_out = 0
+
+    def record_wait(self, wait_ms: float, checked_out: int):
+        with self._lock:
+            self.checkouts += 1
+            self._waits_ms.append(wait_ms)
+            if wait_ms > WAIT_THRESHOLD_MS:
+                self.waited += 1
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._waits_ms)
+            return {
+                "checkouts": self.checkouts,
+                "waited": self.waited,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "peak_checked_out": self.peak_checked_out,
+                "wait_ms": {
+                    "p50": _percentile(samples, 0.50),
+                    "p95": _percentile(samples, 0.95),
+                    "p99": _percentile(samples, 0.99),
+                    "max": round(self.max_wait_ms, 2)
+                }
+            }
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mede quanto cada checkout esperou por uma conexão livre"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait((time.perf_counter() - started) * 1000, self.checkedout())
+        return connection
+
+    def recreate(self):
+        # engine.dispose() recria o pool: mantém os contadores
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument_engine(engine):
+    """Conta conexões novas e invalidadas (ex: derrubadas pelo Postgres e detectadas no pre-ping)"""
+    metrics = getattr(engine.pool, "metrics", None)
+    if metrics is None:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.count("connects")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.count("invalidations")
+
+def pool_stats(engine) -> Dict:
+    """Ocupação atual do pool + métricas acumuladas (saturação = em uso / capacidade máxima)"""
+    pool = engine.pool
+    stats: Dict = {"pool_class": type(pool).__name__}
+    if not isinstance(pool, QueuePool):
+        # NullPool (modo PgBouncer): cada sessão abre e fecha a própria conexão
+        return stats
+
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    stats.update({
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity else None
+    })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.stats())
+    return stats
+
+def _percentile(samples, fraction: float):
+    if not samples:
+        return None
+    return round(samples[int(fraction * (len(samples) - 1))], 2)
@@ -0,0 +1,24 @@
+import json
+from typing import Dict, List
+
+class FixtureCandleSource:
+    """
+    Fonte de candles local, com a mesma interface de HyperliquidClient.get_candles
+    O arquivo é uma lista JSON no formato devolvido pelo candleSnapshot da Hyperliquid:
+    [{"t": 1700000000000, "T": 1700003599999, "s": "BTC", "i": "1h", "o": "...", "h": "...", "l": "...", "c": "...", "v": "...", "n": 0}, ...]
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._candles: Dict[tuple, List[Dict]] = {}
+        with open(path) as fixture_file:
+            for candle in json.load(fixture_file):
+                self._candles.setdefault((candle["s"], candle["i"]), []).append(candle)
+        for candles in self._candles.values():
+            candles.sort(key=lambda candle: candle["t"])
+
+    def get_candles(self, asset_name, interval, start_ms, end_ms):
+        return [
+            candle for candle in self._candles.get((asset_name, interval), [])
+            if start_ms <= candle["t"] <= end_ms
+        ]
@@ -1,27 +1,82 @@
+import threading
 import time
 from hyperliquid.info import Info
 from hyperliquid.exchange import Exchange
-from hyperliquid.utils import constants
 from eth_account import Account
+from config import (
+    HYPERLIQUID_API_URL, HL_INFO_TIMEOUT_SECONDS, HL_EXCHANGE_TIMEOUT_SECONDS,
+    USER_STATE_CACHE_TTL_SECONDS, USER_STATE_CACHE_MAX_ENTRIES
+)
+from infrastructure.ttl_cache import TTLCache
+from infrastructure.external.info_coalescing import CoalescingInfo
+from infrastructure.external.rate_limiter import HyperliquidUnavailable, limited_post
+from infrastructure.external.resilience import guarded_info_post
+
+# Compartilhado entre instâncias (as rotas criam um cliente por requisição)
+user_state_cache = TTLCache(ttl_seconds=USER_STATE_CACHE_TTL_SECONDS, max_entries=USER_STATE_CACHE_MAX_ENTRIES)
+
+def invalidate_user_state(user_address):
+    """Descarta o user_state em cache da carteira (inclusive uma busca em andamento)"""
+    if user_address:
+        user_state_cache.invalidate_group(user_address.lower())
+
+class _LimitedInfo(Info):
+    """Info cujas requisições passam pelo circuit breaker, orçamento de peso e hedge"""
+
+    def post(self, url_path, payload=None):
+        return guarded_info_post(super().post, url_path, payload)
+
+class _LimitedExchange(Exchange):
+    """Exchange cujas ações consomem o orçamento com prioridade alta"""
+
+    def post(self, url_path, payload=None):
+        return limited_post(super().post, url_path, payload)
+
+_shared_info = None
+_shared_info_lock = threading.Lock()
+
+def _get_shared_info() -> CoalescingInfo:
+    """
+    Info único do processo: o construtor do SDK busca meta e spotMeta (peso 40),
+    então não deve rodar a cada requisição
+    """
+    global _shared_info
+    if _shared_info is None:
+        with _shared_info_lock:
+            if _shared_info is None:
+                _shared_info = CoalescingInfo(_LimitedInfo(HYPERLIQUID_API_URL, skip_ws=True, timeout=HL_INFO_TIMEOUT_SECONDS))
+    return _shared_info
 
 class HyperliquidClient:
     def __init__(self):
         # O cliente Info não precisa de chaves e pode ser instanciado uma vez
-        self.info = Info(constants.MAINNET_API_URL, skip_ws=True)
+        # meta/all_mids/candles passam pelo singleflight compartilhado entre instâncias
+        self.info = _get_shared_info()
 
     def get_all_mids(self):
         """Busca o preço médio (mid-price) para todos os ativos."""
         return self.info.all_mids()
 
+    def get_meta_and_asset_ctxs(self):
+        """Busca metadados e contexto de mercado (mark, funding, open interest) de todos os ativos numa única chamada."""
+        return self.info.meta_and_asset_ctxs()
+
     def get_asset_price(self, asset_name):
         """Busca o preço de um ativo específico."""
         mids = self.get_all_mids()
         return float(mids.get(asset_name, 0.0))
 
+    def get_candles(self, asset_name, interval, start_ms, end_ms):
+        """Busca candles OHLCV de um ativo (no máximo 5000 por chamada)."""
+        return self.info.candles_snapshot(asset_name, interval, start_ms, end_ms)
+
     def get_user_state(self, user_address):
-        """Busca o estado da conta de um usuário, incluindo posições."""
+        """Busca o estado da conta de um usuário, incluindo posições (cache curto + singleflight)."""
+        address = user_address.lower()
         try:
-            return self.info.user_state(user_address)
+            return user_state_cache.get_or_set(address, lambda: self.info.user_state(user_address), group=address)
+        except HyperliquidUnavailable:
+            raise
         except Exception as e:
             print(f"Erro ao buscar o estado do usuário: {e}")
             return None
@@ -147,7 +202,7 @@ class HyperliquidClient:
         account = Account.from_key(secret_key)
         
         # 2. Inicializar a classe Exchange com a conta do usuário para esta transação específica
-        exchange = Exchange(account, constants.MAINNET_API_URL)
+        exchange = _LimitedExchange(account, HYPERLIQUID_API_URL, timeout=HL_EXCHANGE_TIMEOUT_SECONDS)
         
         # 3. Configurar leverage para o ativo antes de fazer a ordem
         if is_live_trading:
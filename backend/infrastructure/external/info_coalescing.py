@@ -0,0 +1,188 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable
+from config import INFO_META_CACHE_SECONDS, INFO_MIDS_CACHE_SECONDS, INFO_COALESCE_MAX_TRACKED_KEYS
+from infrastructure.ttl_cache import SingleFlight, TTLCache
+
+_MISSING = object()
+
+class RequestCoalescer:
+    """
+    Singleflight + micro-cache opcional para chamadas idempotentes à API
+    - chamadas idênticas em andamento são feitas uma única vez (threads e event loop)
+    - com ttl_seconds > 0 o resultado é reaproveitado por esse tempo
+    - se a chamada falhar (rate limiter, circuit breaker, timeout), serve o último valor obtido (até stale_seconds)
+    - contadores por chave: calls, hits (micro-cache), coalesced, upstream, stale, errors
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float = 0.0,
+        max_entries: int = 256,
+        max_tracked_keys: int = 500,
+        stale_seconds: float = 300.0
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_tracked_keys = max_tracked_keys
+        self._cache = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries) if ttl_seconds > 0 else None
+        self._stale = TTLCache(ttl_seconds=stale_seconds, max_entries=max_entries) if stale_seconds > 0 else None
+        self._flights = SingleFlight()
+        self._async_flights: Dict[tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def call(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        if self._cache is not None:
+            value = self._cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self._count(key, "hits")
+                return value
+
+        def upstream():
+            self._count(key, "upstream")
+            try:
+                value = fn()
+            except Exception:
+                self._count(key, "errors")
+                raise
+            if self._cache is not None:
+                self._cache.set(key, value)
+            if self._stale is not None:
+                self._stale.set(key, value)
+            return value
+
+        try:
+            value, shared = self._flights.do(key, upstream)
+        except Exception:
+            stale = self._stale.get(key, _MISSING) if self._stale is not None else _MISSING
+            if stale is _MISSING:
+                raise
+            self._count(key, "stale")
+            return stale
+        if shared:
+            self._count(key, "coalesced")
+        return value
+
+    async def acall(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Versão para o event loop: fn() (bloqueante) roda numa thread; corrotinas que pedem
+        a mesma chave aguardam o mesmo Future, e a thread passa pelo singleflight síncrono
+        (então também compartilha com chamadas feitas de rotas síncronas)
+        """
+        if self._cache is not None:
+            value = self._cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self._count(key, "hits")
+                return value
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        future = self._async_flights.get(flight_key)
+        if future is not None:
+            self._count(key, "coalesced")
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._async_flights[flight_key] = future
+        try:
+            value = await asyncio.to_thread(self.call, key, fn)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evita o aviso "exception was never retrieved" quando não há outros aguardando
+            future.exception()
+            raise
+        finally:
+            self._async_flights.pop(flight_key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            keys = {key: dict(counters) for key, counters in self._counters.items()}
+        totals: Dict[str, int] = {}
+        for counters in keys.values():
+            for counter, value in counters.items():
+                totals[counter] = totals.get(counter, 0) + value
+        return {
+            "name": self.name,
+            "ttl_seconds": self.ttl_seconds,
+            "in_flight": self._flights.in_flight(),
+            "totals": totals,
+            "keys": keys
+        }
+
+    def _count(self, key: Hashable, counter: str):
+        label = _key_label(key)
+        with self._lock:
+            counters = self._counters.get(label)
+            if counters is None:
+                if len(self._counters) >= self.max_tracked_keys:
+                    # Limita a memória dos contadores (ex: candles com janelas sempre novas)
+                    label = "(outras)"
+                    counters = self._counters.setdefault(label, {})
+                else:
+                    counters = self._counters[label] = {}
+            if counter in ("hits", "coalesced", "upstream"):
+                counters["calls"] = counters.get("calls", 0) + 1
+            counters[counter] = counters.get(counter, 0) + 1
+
+
+def _key_label(key: Hashable) -> str:
+    if isinstance(key, tuple) and key and isinstance(key[0], str):
+        method, *args = key
+        return f"{method}({', '.join(repr(arg) for arg in args)})"
+    return repr(key)
+
+
+# Métodos do Info coalescidos e a duração do micro-cache de cada um (0 = só singleflight)
+COALESCED_INFO_METHODS = {
+    "meta": INFO_META_CACHE_SECONDS,
+    "meta_and_asset_ctxs": INFO_MIDS_CACHE_SECONDS,
+    "all_mids": INFO_MIDS_CACHE_SECONDS,
+    "candles_snapshot": 0.0,
+}
+
+# Compartilhados entre instâncias do cliente (as rotas criam um cliente por requisição)
+info_coalescers: Dict[str, RequestCoalescer] = {
+    method: RequestCoalescer(f"info.{method}", ttl_seconds=ttl, max_tracked_keys=INFO_COALESCE_MAX_TRACKED_KEYS)
+    for method, ttl in COALESCED_INFO_METHODS.items()
+}
+
+class CoalescingInfo:
+    """
+    Proxy do hyperliquid Info: os métodos de COALESCED_INFO_METHODS passam pelo
+    RequestCoalescer (chave = método + argumentos); os demais vão direto ao Info
+    """
+
+    def __init__(self, info):
+        self._info = info
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._info, name)
+        coalescer = info_coalescers.get(name)
+        if coalescer is None or not callable(attribute):
+            return attribute
+
+        def coalesced(*args, **kwargs):
+            return coalescer.call(_request_key(name, args, kwargs), lambda: attribute(*args, **kwargs))
+        return coalesced
+
+    async def acall(self, name: str, *args, **kwargs) -> Any:
+        """Mesma chamada a partir de código async: await info.acall("all_mids")"""
+        attribute = getattr(self._info, name)
+        coalescer = info_coalescers.get(name)
+        if coalescer is None:
+            return await asyncio.to_thread(attribute, *args, **kwargs)
+        return await coalescer.acall(_request_key(name, args, kwargs), lambda: attribute(*args, **kwargs))
+
+
+def _request_key(method: str, args: tuple, kwargs: dict) -> tuple:
+    return (method, *args, *sorted(kwargs.items()))
+
+def info_coalescing_stats() -> Dict:
+    return {method: coalescer.stats() for method, coalescer in info_coalescers.items()}
@@ -0,0 +1,213 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Dict
+from fastapi.responses import JSONResponse
+from config import (
+    HL_RATE_LIMIT_WEIGHT_PER_MINUTE, HL_RATE_LIMIT_NORMAL_RESERVE,
+    HL_RATE_LIMIT_LOW_RESERVE, HL_RATE_LIMIT_MAX_WAIT_SECONDS
+)
+
+class Priority(IntEnum):
+    LOW = 0      # dashboard, jobs em segundo plano
+    NORMAL = 1   # padrão
+    HIGH = 2     # fluxo de ordens (webhook, leverage, ordem)
+
+# Pesos do limite por IP da Hyperliquid (1200/min): estes tipos de /info pesam 2, os demais 20
+LIGHT_INFO_TYPES = {"l2Book", "allMids", "clearinghouseState", "orderStatus", "spotClearinghouseState", "exchangeStatus"}
+LIGHT_INFO_WEIGHT = 2
+DEFAULT_INFO_WEIGHT = 20
+# Respostas com muitos itens (candles, fills) pesam 1 a mais a cada 60 itens
+ITEMS_PER_EXTRA_WEIGHT = 60
+
+_current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar("hyperliquid_priority", default=Priority.NORMAL)
+
+class HyperliquidUnavailable(Exception):
+    """Chamada não enviada à Hyperliquid agora; convertida em 503 com Retry-After"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class RateLimitShed(HyperliquidUnavailable):
+    """Chamada de baixa prioridade recusada para preservar orçamento para as ordens"""
+
+    def __init__(self, priority: Priority, retry_after: float):
+        super().__init__(f"Limite de requisições da Hyperliquid reservado para ordens (prioridade {priority.name})", retry_after)
+        self.priority = priority
+
+class WeightedRateLimiter:
+    """
+    Orçamento de peso estilo token bucket (capacity por window_seconds)
+    Cada prioridade só consome acima da sua reserva: LOW não usa as últimas
+    low_reserve do orçamento, NORMAL não usa as últimas normal_reserve e HIGH usa tudo.
+    HIGH espera a reposição; NORMAL espera enquanto não houver HIGH na fila;
+    LOW é recusado na hora (RateLimitShed) para o chamador servir do cache.
+    """
+
+    def __init__(
+        self,
+        capacity: float = 1200,
+        window_seconds: float = 60.0,
+        normal_reserve: float = 0.1,
+        low_reserve: float = 0.4,
+        max_wait_seconds: float = 10.0
+    ):
+        self.capacity = capacity
+        self.refill_per_second = capacity / window_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._floors = {
+            Priority.HIGH: 0.0,
+            Priority.NORMAL: capacity * normal_reserve,
+            Priority.LOW: capacity * low_reserve
+        }
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        self._waiting_high = 0
+        self._counters = {priority: {"granted": 0, "waited": 0, "shed": 0, "weight": 0} for priority in Priority}
+        self.penalties = 0
+
+    def acquire(self, weight: float, priority: Priority = Priority.NORMAL):
+        deadline = time.monotonic() + self.max_wait_seconds
+        counters = self._counters[priority]
+        waited = False
+        with self._condition:
+            if priority == Priority.HIGH:
+                self._waiting_high += 1
+            try:
+                while True:
+                    self._refill()
+                    blocked_by_high = priority < Priority.HIGH and self._waiting_high > 0
+                    missing = weight + self._floors[priority] - self._tokens
+                    if missing <= 0 and not blocked_by_high:
+                        self._tokens -= weight
+                        counters["granted"] += 1
+                        counters["weight"] += weight
+                        if waited:
+                            counters["waited"] += 1
+                        return
+
+                    wait = max(missing / self.refill_per_second, 0.05)
+                    remaining = deadline - time.monotonic()
+                    if priority == Priority.LOW or remaining <= 0:
+                        counters["shed"] += 1
+                        raise RateLimitShed(priority, retry_after=wait)
+                    waited = True
+                    self._condition.wait(min(wait, remaining))
+            finally:
+                if priority == Priority.HIGH:
+                    self._waiting_high -= 1
+                    self._condition.notify_all()
+
+    def try_acquire(self, weight: float, priority: Priority = Priority.NORMAL) -> bool:
+        """Consome sem esperar (requisições opcionais, como hedges)"""
+        with self._condition:
+            self._refill()
+            if priority < Priority.HIGH and self._waiting_high > 0:
+                return False
+            if self._tokens - weight < self._floors[priority]:
+                return False
+            self._tokens -= weight
+            self._counters[priority]["granted"] += 1
+            self._counters[priority]["weight"] += weight
+            return True
+
+    def charge(self, weight: float):
+        """Peso conhecido só depois da resposta (itens extras); pode deixar o saldo negativo"""
+        if weight <= 0:
+            return
+        with self._condition:
+            self._refill()
+            self._tokens -= weight
+
+    def penalize(self):
+        """O servidor respondeu 429: zera o saldo para todos recuarem"""
+        with self._condition:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = time.monotonic()
+            self.penalties += 1
+
+    def stats(self) -> Dict:
+        with self._condition:
+            self._refill()
+            return {
+                "capacity": self.capacity,
+                "available": round(self._tokens, 1),
+                "refill_per_second": self.refill_per_second,
+                "waiting_high": self._waiting_high,
+                "penalties": self.penalties,
+                "priorities": {priority.name: dict(counters) for priority, counters in self._counters.items()}
+            }
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+
+hyperliquid_limiter = WeightedRateLimiter(
+    capacity=HL_RATE_LIMIT_WEIGHT_PER_MINUTE,
+    normal_reserve=HL_RATE_LIMIT_NORMAL_RESERVE,
+    low_reserve=HL_RATE_LIMIT_LOW_RESERVE,
+    max_wait_seconds=HL_RATE_LIMIT_MAX_WAIT_SECONDS
+)
+
+def hyperliquid_unavailable_handler(request, exc: HyperliquidUnavailable) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+    )
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+def set_api_priority(priority: Priority):
+    """Define a prioridade das chamadas à Hyperliquid no contexto atual (requisição/thread)"""
+    _current_priority.set(priority)
+
+async def low_api_priority():
+    """
+    Dependência de router (dashboard): async para rodar no contexto da requisição,
+    que é copiado para a thread da rota síncrona
+    """
+    _current_priority.set(Priority.LOW)
+
+@contextmanager
+def api_priority(priority: Priority):
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def info_weight(payload: Any) -> int:
+    request_type = payload.get("type") if isinstance(payload, dict) else None
+    return LIGHT_INFO_WEIGHT if request_type in LIGHT_INFO_TYPES else DEFAULT_INFO_WEIGHT
+
+def exchange_weight(payload: Any) -> int:
+    """Ações de /exchange: 1 + 1 a cada 40 itens do lote"""
+    action = payload.get("action", {}) if isinstance(payload, dict) else {}
+    batch = action.get("orders") or action.get("cancels") or action.get("modifies") or []
+    return 1 + len(batch) // 40
+
+def limited_post(post, url_path: str, payload: Any = None) -> Any:
+    """Envolve API.post do SDK: reserva o peso antes e cobra itens extras / 429 depois"""
+    if url_path == "/exchange":
+        hyperliquid_limiter.acquire(exchange_weight(payload), Priority.HIGH)
+    else:
+        hyperliquid_limiter.acquire(info_weight(payload), current_priority())
+
+    try:
+        result = post(url_path, payload)
+    except Exception as e:
+        if getattr(e, "status_code", None) == 429:
+            hyperliquid_limiter.penalize()
+        raise
+
+    if isinstance(result, list) and len(result) >= ITEMS_PER_EXTRA_WEIGHT:
+        hyperliquid_limiter.charge(len(result) // ITEMS_PER_EXTRA_WEIGHT)
+    return result
@@ -0,0 +1,240 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+import requests
+from hyperliquid.utils.error import ClientError, ServerError
+from config import (
+    HL_HEDGE_ENABLED, HL_HEDGE_MIN_DELAY_MS, HL_HEDGE_MAX_DELAY_MS, HL_HEDGE_MAX_WORKERS,
+    HL_BREAKER_FAILURE_THRESHOLD, HL_BREAKER_COOLDOWN_SECONDS
+)
+from infrastructure.external.rate_limiter import (
+    HyperliquidUnavailable, current_priority, hyperliquid_limiter, info_weight, limited_post
+)
+
+# Amostras de latência por tipo de requisição usadas no p95 do hedge
+LATENCY_SAMPLES = 200
+MIN_SAMPLES_FOR_P95 = 20
+
+class CircuitOpen(HyperliquidUnavailable):
+    """Hyperliquid degradada: chamadas recusadas até o fim do cooldown"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Hyperliquid indisponível no momento (circuit breaker aberto)", retry_after)
+
+class CircuitBreaker:
+    """
+    closed -> open após failure_threshold falhas seguidas (timeout, conexão, 5xx, 429)
+    open -> half_open depois de cooldown_seconds; uma única chamada de teste passa
+    half_open -> closed se o teste funcionar, open de novo se falhar
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, cooldown_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = "closed"
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self._opened_at + self.cooldown_seconds - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+            raise CircuitOpen(retry_after=max(remaining, 1.0))
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self.state != "closed":
+                print(f"✅ Circuit breaker '{self.name}' fechado")
+            self.state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self._consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    print(f"⚠️ Circuit breaker '{self.name}' aberto após {self._consecutive_failures} falhas")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Chamada de teste terminou sem dizer nada sobre a saúde do upstream (ex: erro 4xx)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self._consecutive_failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+class HedgedCaller:
+    """
+    Requisições idempotentes com hedge: a primeira tentativa roda numa thread própria,
+    iniciada na hora (sem fila compartilhada, então não espera atrás de chamadas de menor
+    prioridade); se ela não responde até o p95 recente daquele tipo, contado a partir
+    do início dela, um hedge é disparado e vale a que responder primeiro com sucesso
+    """
+
+    def __init__(self, enabled: bool = True, min_delay_ms: float = 50, max_delay_ms: float = 1000, max_workers: int = 16):
+        self.enabled = enabled
+        self.min_delay = min_delay_ms / 1000
+        self.max_delay = max_delay_ms / 1000
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hl-hedge") if enabled else None
+        # Hedges nunca esperam na fila do pool: sem worker livre, o hedge é pulado
+        self._free_workers = threading.BoundedSemaphore(max_workers)
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+
+    def call(self, kind: str, fn: Callable[[], Any], allow_hedge: Callable[[], bool]) -> Any:
+        with self._lock:
+            self.calls += 1
+        if not self.enabled:
+            return self._timed(kind, fn)
+
+        delay = self.hedge_delay(kind)
+        primary = self._start_primary(kind, fn)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge = self._launch_hedge(kind, fn, allow_hedge)
+        if hedge is None:
+            return primary.result()
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+        return primary.result()
+
+    def _start_primary(self, kind: str, fn: Callable[[], Any]) -> Future:
+        """Thread por chamada: começa imediatamente, então o prazo do hedge conta do início real"""
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            try:
+                future.set_result(self._timed(kind, fn))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="hl-info", daemon=True).start()
+        return future
+
+    def _launch_hedge(self, kind: str, fn: Callable[[], Any], allow_hedge: Callable[[], bool]) -> Optional[Future]:
+        if not self._free_workers.acquire(blocking=False):
+            with self._lock:
+                self.hedges_skipped += 1
+            return None
+        if not allow_hedge():
+            self._free_workers.release()
+            with self._lock:
+                self.hedges_skipped += 1
+            return None
+        hedge = self._pool.submit(self._timed, kind, fn)
+        hedge.add_done_callback(lambda _: self._free_workers.release())
+        with self._lock:
+            self.hedges += 1
+        return hedge
+
+    def hedge_delay(self, kind: str) -> float:
+        with self._lock:
+            samples = sorted(self._latencies.get(kind, ()))
+        if len(samples) < MIN_SAMPLES_FOR_P95:
+            return self.max_delay
+        p95 = samples[int(0.95 * (len(samples) - 1))]
+        return min(max(p95, self.min_delay), self.max_delay)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            kinds = list(self._latencies)
+            stats = {
+                "enabled": self.enabled,
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedges_skipped": self.hedges_skipped
+            }
+        stats["hedge_delay_ms"] = {kind: round(self.hedge_delay(kind) * 1000, 1) for kind in kinds}
+        return stats
+
+    def _timed(self, kind: str, fn: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        result = fn()
+        with self._lock:
+            self._latencies.setdefault(kind, deque(maxlen=LATENCY_SAMPLES)).append(time.monotonic() - started)
+        return result
+
+
+info_breaker = CircuitBreaker("info", HL_BREAKER_FAILURE_THRESHOLD, HL_BREAKER_COOLDOWN_SECONDS)
+info_hedger = HedgedCaller(HL_HEDGE_ENABLED, HL_HEDGE_MIN_DELAY_MS, HL_HEDGE_MAX_DELAY_MS, HL_HEDGE_MAX_WORKERS)
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Falhas que indicam Hyperliquid degradada (erros 4xx de validação não contam)"""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError, ServerError)):
+        return True
+    return isinstance(error, ClientError) and error.status_code == 429
+
+def guarded_info_post(post: Callable[[str, Any], Any], url_path: str, payload: Any = None) -> Any:
+    """
+    /info: circuit breaker -> rate limiter -> hedge
+    O hedge só sai se o orçamento tiver folga para a prioridade atual (sem esperar).
+    """
+    info_breaker.before_call()
+    kind = payload.get("type", "?") if isinstance(payload, dict) else "?"
+    priority = current_priority()
+
+    def hedged(path, body):
+        return info_hedger.call(
+            kind,
+            lambda: post(path, body),
+            allow_hedge=lambda: hyperliquid_limiter.try_acquire(info_weight(body), priority)
+        )
+
+    try:
+        result = limited_post(hedged, url_path, payload)
+    except HyperliquidUnavailable:
+        info_breaker.release_probe()
+        raise
+    except Exception as e:
+        if is_upstream_failure(e):
+            info_breaker.record_failure()
+        else:
+            info_breaker.release_probe()
+        raise
+    info_breaker.record_success()
+    return result
+
+def upstream_stats() -> Dict:
+    return {"info_breaker": info_breaker.stats(), "info_hedging": info_hedger.stats()}
@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, Optional, Sequence
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+class FastJSONResponse(JSONResponse):
+    """
+    Serialização direta com orjson (datetime, listas de dicts) sem passar pelo
+    response_model. Usar só com dados internos já no formato final.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def fast_json_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """
+    Monta a resposta rápida mantendo os headers já definidos no Response injetado
+    (paginação, ETag) - o FastAPI não os copia quando a rota devolve um Response
+    """
+    headers = None
+    if response is not None:
+        headers = {
+            key: value for key, value in response.headers.items()
+            if key not in ("content-length", "content-type")
+        }
+    return FastJSONResponse(content=content, status_code=status_code, headers=headers)
+
+def to_columnar(rows: List[Dict], keys: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Converte uma lista de objetos em arrays paralelos (um por campo)
+    {"length": n, "columns": {"timestamp": [...], "price": [...]}} - os nomes dos
+    campos aparecem uma vez em vez de uma vez por linha.
+    """
+    if keys is None:
+        keys = list(rows[0].keys()) if rows else []
+    return {
+        "length": len(rows),
+        "columns": {key: [row.get(key) for row in rows] for key in keys}
+    }
@@ -0,0 +1,81 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from fastapi import Depends, Request, Response
+from fastapi.responses import Response as PlainResponse
+from infrastructure.security import get_current_user
+
+class NotModified(Exception):
+    """Interrompe a rota antes das consultas; convertido em 304 pelo handler registrado no app"""
+
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+def not_modified_handler(request: Request, exc: NotModified) -> PlainResponse:
+    return PlainResponse(status_code=304, headers=exc.headers)
+
+def build_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def check_conditional_get(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = "private, no-cache"
+):
+    """
+    Compara If-None-Match / If-Modified-Since com a versão atual
+    Levanta NotModified se o cliente já tem a representação; senão grava os headers na resposta.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"}
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            raise NotModified(headers)
+    elif last_modified is not None and _not_modified_since(request.headers.get("if-modified-since"), last_modified):
+        raise NotModified(headers)
+
+    response.headers.update(headers)
+
+def user_data_etag(request: Request, response: Response, current_user=Depends(get_current_user)):
+    """
+    Dependência para GETs que só dependem dos dados do usuário (dashboard, webhooks)
+    O ETag combina a versão dos dados do usuário, a URL e o dia UTC (períodos como
+    "7d" andam com o calendário mesmo sem escrita nova).
+    """
+    now = datetime.now(timezone.utc)
+    etag = build_etag(current_user.id, current_user.data_version or 0, now.date(), request.url.path, request.url.query)
+    
+    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    last_modified = current_user.data_updated_at
+    if last_modified is not None and last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    last_modified = max(last_modified, start_of_day) if last_modified else start_of_day
+    check_conditional_get(request, response, etag, last_modified)
+
+def _etag_matches(header_value: str, etag: str) -> bool:
+    if header_value.strip() == "*":
+        return True
+    # Comparação fraca: ignora o prefixo W/
+    current = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == current for candidate in header_value.split(","))
+
+def _not_modified_since(header_value: Optional[str], last_modified: datetime) -> bool:
+    if not header_value:
+        return False
+    try:
+        since = parsedate_to_datetime(header_value)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # Last-Modified tem resolução de segundos
+    return last_modified.replace(microsecond=0) <= since
@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import desc, tuple_
+from sqlalchemy.orm import Query
+
+# Contagem total opcional: acima deste valor a contagem para e é marcada como aproximada
+TOTAL_COUNT_CAP = 10000
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Cursor opaco com a chave (timestamp, id) do último item da página"""
+    payload = json.dumps({"t": timestamp.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(payload["t"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido")
+
+def keyset_page(query: Query, timestamp_column, id_column, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Página mais recente-primeiro ordenada por (timestamp, id)
+    Com um índice em (..., timestamp, id) cada página é uma leitura de intervalo no índice,
+    independente de quão longe o cliente já paginou.
+    """
+    if cursor:
+        cursor_timestamp, cursor_id = decode_cursor(cursor)
+        query = query.filter(tuple_(timestamp_column, id_column) < tuple_(cursor_timestamp, cursor_id))
+
+    rows = query.order_by(desc(timestamp_column), desc(id_column)).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
+
+    return rows, next_cursor
+
+def bounded_count(query: Query, cap: int = TOTAL_COUNT_CAP) -> Tuple[int, bool]:
+    """Conta no máximo `cap` linhas; retorna (total, is_estimate)"""
+    total = query.order_by(None).limit(cap + 1).count()
+    if total > cap:
+        return cap, True
+    return total, False
+
+def set_pagination_headers(response: Response, next_cursor: Optional[str], total: Optional[int] = None, total_is_estimate: bool = False):
+    """Metadados de paginação em headers para endpoints que retornam listas"""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+        if total_is_estimate:
+            response.headers["X-Total-Count-Estimate"] = "true"
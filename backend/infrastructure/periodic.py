@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Callable, Optional
+
+class PeriodicTask:
+    """
+    Executa fn() a cada interval_seconds numa thread daemon
+    O intervalo conta a partir do fim da execução anterior (execuções nunca se sobrepõem).
+    Exceções são registradas e não interrompem o agendamento.
+    """
+
+    def __init__(self, name: str, interval_seconds: float, fn: Callable[[], object], initial_delay: float = 0.0):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.fn = fn
+        self.initial_delay = initial_delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.failures = 0
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"periodic-{self.name}", daemon=True)
+        self._thread.start()
+        print(f"⏱️ Tarefa periódica '{self.name}' iniciada (a cada {self.interval_seconds:.0f}s)")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run_once(self):
+        started = time.monotonic()
+        try:
+            self.fn()
+            self.last_error = None
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"❌ Erro na tarefa periódica '{self.name}': {e}")
+        finally:
+            self.runs += 1
+            self.last_duration = time.monotonic() - started
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval_seconds,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error
+        }
+
+    def _loop(self):
+        if self._stop.wait(self.initial_delay):
+            return
+        while not self._stop.is_set():
+            self.run_once()
+            if self._stop.wait(self.interval_seconds):
+                return
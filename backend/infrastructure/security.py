@@ -5,13 +5,16 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from config import SECRET_KEY, ALGORITHM, cipher_suite
+from config import SECRET_KEY, ALGORITHM, STREAM_TICKET_TTL_SECONDS, ADMIN_EMAILS, cipher_suite
 from infrastructure.database import get_db
 
 # Security instances
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Escopo dos tokens que só servem para abrir o stream do dashboard
+STREAM_TICKET_SCOPE = "dashboard_stream"
+
 # Encryption functions
 def encrypt_data(data: str) -> Optional[str]:
     """Criptografa dados usando Fernet"""
@@ -44,14 +47,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     """Obtém o usuário atual a partir do token JWT"""
+    return get_user_from_token(credentials.credentials, db)
+
+def get_admin_user(current_user=Depends(get_current_user)):
+    """Usuário atual, desde que esteja em ADMIN_EMAILS (rotas internas de operação)"""
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Acesso restrito a administradores")
+    return current_user
+
+def get_user_from_token(token: str, db: Session):
+    """Valida o token JWT e retorna o usuário correspondente"""
     # Import here to avoid circular imports
     from domain.models import User
     
     credentials_exception = HTTPException(status.HTTP_401_UNAUTHORIZED, "Credenciais inválidas")
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id_str = payload.get("sub")
-        if user_id_str is None:
+        # Tickets do stream não valem como token de acesso
+        if user_id_str is None or payload.get("scope") is not None:
             raise credentials_exception
         user_id = int(user_id_str)
     except (JWTError, ValueError, TypeError):
@@ -60,4 +74,29 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
+
+def create_stream_ticket(user_id: int) -> str:
+    """Ticket de curta duração para o stream SSE (EventSource não envia o header Authorization)"""
+    return create_access_token(
+        {"sub": str(user_id), "scope": STREAM_TICKET_SCOPE},
+        expires_delta=timedelta(seconds=STREAM_TICKET_TTL_SECONDS)
+    )
+
+def get_user_from_stream_ticket(ticket: str, db: Session):
+    """Valida um ticket do stream (só tokens com o escopo do stream são aceitos)"""
+    from domain.models import User
+
+    credentials_exception = HTTPException(status.HTTP_401_UNAUTHORIZED, "Ticket do stream inválido ou expirado")
+    try:
+        payload = jwt.decode(ticket, SECRET_KEY, algorithms=[ALGORITHM])
+        if payload.get("scope") != STREAM_TICKET_SCOPE:
+            raise credentials_exception
+        user_id = int(payload["sub"])
+    except (JWTError, KeyError, ValueError, TypeError):
+        raise credentials_exception
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        raise credentials_exception
+    return user
@@ -0,0 +1,163 @@
+# --- account_snapshots.py ---
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from domain.models import AccountSnapshot, Wallet
+from infrastructure.database import SessionLocal
+from infrastructure.services.dashboard_cache import invalidate_user_dashboard, touch_user_data, touch_users_data
+from config import SNAPSHOT_MAX_CONCURRENCY
+
+SNAPSHOT_FIELDS = ["total_balance", "available_balance", "used_margin", "total_unrealized_pnl", "total_positions_value"]
+
+# Diferença abaixo da qual a conta é considerada inalterada (USD)
+SNAPSHOT_CHANGE_EPSILON = 0.01
+
+def snapshot_values_from_user_state(user_state: Dict) -> Dict:
+    """Extrai os campos de AccountSnapshot da resposta clearinghouseState da Hyperliquid"""
+    margin_summary = user_state.get("marginSummary", {})
+    unrealized_pnl = sum(
+        float(asset_position.get("position", {}).get("unrealizedPnl", 0) or 0)
+        for asset_position in user_state.get("assetPositions", [])
+    )
+    return {
+        "total_balance": float(margin_summary.get("accountValue", 0) or 0),
+        "available_balance": float(user_state.get("withdrawable", 0) or 0),
+        "used_margin": float(margin_summary.get("totalMarginUsed", 0) or 0),
+        "total_unrealized_pnl": unrealized_pnl,
+        "total_positions_value": float(margin_summary.get("totalNtlPos", 0) or 0)
+    }
+
+def record_account_snapshot(db: Session, user_id: int, user_state: Dict) -> AccountSnapshot:
+    """Grava um snapshot a partir do user_state (snapshot manual de um único usuário)"""
+    snapshot = AccountSnapshot(
+        user_id=user_id,
+        timestamp=datetime.now(timezone.utc),
+        **snapshot_values_from_user_state(user_state)
+    )
+    db.add(snapshot)
+    touch_user_data(db, user_id)
+    db.commit()
+    invalidate_user_dashboard(user_id)
+    return snapshot
+
+class AccountSnapshotWorker:
+    """
+    Snapshot periódico de todas as carteiras
+    - user_state buscado em paralelo com concorrência limitada (uma chamada por carteira)
+    - contas sem mudança desde o último snapshot são puladas
+    - snapshots novos gravados num único INSERT em lote
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        client_factory: Optional[Callable[[], object]] = None,
+        max_concurrency: int = SNAPSHOT_MAX_CONCURRENCY
+    ):
+        self.session_factory = session_factory
+        self.client_factory = client_factory or _default_client
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self.last_result: Optional[Dict] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    def run_once(self, user_ids: Optional[List[int]] = None) -> Dict:
+        started = time.monotonic()
+        db = self.session_factory()
+        try:
+            wallets = self._load_wallets(db, user_ids)
+            latest = self._load_latest_snapshots(db, [user_id for user_id, _ in wallets])
+
+            fetched = self._fetch_user_states(wallets)
+
+            now = datetime.now(timezone.utc)
+            rows = []
+            skipped = 0
+            failed = 0
+            for user_id, user_state in fetched:
+                if user_state is None:
+                    failed += 1
+                    continue
+                values = snapshot_values_from_user_state(user_state)
+                if _unchanged(latest.get(user_id), values):
+                    skipped += 1
+                    continue
+                rows.append({"user_id": user_id, "timestamp": now, **values})
+
+            if rows:
+                db.execute(insert(AccountSnapshot), rows)
+                touch_users_data(db, [row["user_id"] for row in rows])
+                db.commit()
+                for row in rows:
+                    invalidate_user_dashboard(row["user_id"])
+
+            self.last_result = {
+                "wallets": len(wallets),
+                "written": len(rows),
+                "skipped_unchanged": skipped,
+                "failed": failed,
+                "duration_seconds": round(time.monotonic() - started, 3)
+            }
+            print(f"📸 Snapshots: {self.last_result}")
+            return self.last_result
+        finally:
+            db.close()
+
+    def _load_wallets(self, db: Session, user_ids: Optional[List[int]]) -> List[Tuple[int, str]]:
+        query = db.query(Wallet.user_id, Wallet.public_address).filter(Wallet.public_address.isnot(None))
+        if user_ids:
+            query = query.filter(Wallet.user_id.in_(user_ids))
+        return [(user_id, address) for user_id, address in query.all()]
+
+    def _load_latest_snapshots(self, db: Session, user_ids: List[int]) -> Dict[int, Dict]:
+        """Último snapshot de cada usuário numa única consulta"""
+        if not user_ids:
+            return {}
+        latest_ids = db.query(
+            func.max(AccountSnapshot.id)
+        ).filter(AccountSnapshot.user_id.in_(user_ids)).group_by(AccountSnapshot.user_id)
+
+        snapshots = db.query(AccountSnapshot).filter(AccountSnapshot.id.in_(latest_ids)).all()
+        return {
+            snapshot.user_id: {field: getattr(snapshot, field) for field in SNAPSHOT_FIELDS}
+            for snapshot in snapshots
+        }
+
+    def _fetch_user_states(self, wallets: List[Tuple[int, str]]) -> List[Tuple[int, Optional[Dict]]]:
+        if not wallets:
+            return []
+        client = self.client
+
+        def fetch(address: str) -> Optional[Dict]:
+            # Falha de uma carteira não derruba a passada inteira
+            try:
+                return client.get_user_state(address)
+            except Exception as e:
+                print(f"❌ Erro ao buscar user_state de {address}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency), thread_name_prefix="snapshot") as pool:
+            states = pool.map(fetch, [address for _, address in wallets])
+            return [(user_id, state) for (user_id, _), state in zip(wallets, states)]
+
+
+def _unchanged(previous: Optional[Dict], values: Dict) -> bool:
+    if previous is None:
+        return False
+    return all(
+        abs((previous.get(field) or 0.0) - values[field]) < SNAPSHOT_CHANGE_EPSILON
+        for field in SNAPSHOT_FIELDS
+    )
+
+
+def _default_client():
+    from infrastructure.external.hyperliquid_client import HyperliquidClient
+    return HyperliquidClient()
@@ -0,0 +1,237 @@
+# --- candle_store.py ---
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from domain.models import Candle
+from infrastructure.ttl_cache import SingleFlight, TTLCache
+from infrastructure.upsert import upsert_rows
+from config import CANDLE_FIXTURE_PATH, CANDLE_REFRESH_SECONDS
+
+# Intervalos suportados pelo candleSnapshot, do menor para o maior
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "4h": 4 * 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+# A Hyperliquid devolve no máximo 5000 candles por chamada
+MAX_CANDLES_PER_FETCH = 5000
+
+# Buscas recentes por (ativo, intervalo): bordas já tentadas não voltam à fonte antes de CANDLE_REFRESH_SECONDS
+_recent_top_ups = TTLCache(ttl_seconds=CANDLE_REFRESH_SECONDS, max_entries=4096)
+_top_up_flights = SingleFlight()
+
+def get_candle_source():
+    """Fonte de candles padrão: fixture local se configurada, senão a API da Hyperliquid"""
+    if CANDLE_FIXTURE_PATH:
+        from infrastructure.external.candle_fixture import FixtureCandleSource
+        return FixtureCandleSource(CANDLE_FIXTURE_PATH)
+
+    from infrastructure.external.hyperliquid_client import HyperliquidClient
+    return HyperliquidClient()
+
+def pick_interval(start: datetime, end: datetime, points: int) -> str:
+    """Maior intervalo que ainda gera `points` candles na janela (o menor, se nenhum gerar)"""
+    span_seconds = max((end - start).total_seconds(), 0)
+    for interval, seconds in reversed(list(INTERVAL_SECONDS.items())):
+        if span_seconds / seconds >= points:
+            return interval
+    return next(iter(INTERVAL_SECONDS))
+
+class CandleStore:
+    """
+    Cache local de candles OHLCV por (ativo, intervalo)
+    Só as bordas que faltam na janela pedida são buscadas na fonte; o candle mais
+    recente (ainda aberto) é atualizado no máximo a cada CANDLE_REFRESH_SECONDS.
+    """
+
+    def __init__(self, db: Session, source=None):
+        self.db = db
+        self._source = source
+
+    @property
+    def source(self):
+        # Criada só quando é preciso buscar candles (HyperliquidClient acessa a rede ao iniciar)
+        if self._source is None:
+            self._source = get_candle_source()
+        return self._source
+
+    def get_series(
+        self,
+        asset_name: str,
+        start: datetime,
+        end: datetime,
+        points: int = 500,
+        interval: Optional[str] = None
+    ) -> Dict:
+        """Candles da janela [start, end] reduzidos para no máximo `points` pontos"""
+        start = _to_naive_utc(start)
+        end = _to_naive_utc(end)
+        interval = interval or pick_interval(start, end, points)
+        step = timedelta(seconds=INTERVAL_SECONDS[interval])
+
+        # Não busca mais do que uma chamada da API consegue devolver
+        start = max(start, end - step * MAX_CANDLES_PER_FETCH)
+        start = _floor_time(start, step)
+
+        self._top_up(asset_name, interval, start, end)
+
+        candles = self.db.query(Candle).filter(
+            and_(
+                Candle.asset_name == asset_name,
+                Candle.interval == interval,
+                Candle.open_time >= start,
+                Candle.open_time <= end
+            )
+        ).order_by(Candle.open_time).all()
+
+        return {
+            "interval": interval,
+            "candles": downsample_ohlc(candles, points)
+        }
+
+    def _top_up(self, asset_name: str, interval: str, start: datetime, end: datetime):
+        """
+        Uma busca por (ativo, intervalo) por vez neste processo: quem chega durante uma
+        busca espera por ela e depois confere de novo só o que ainda faltar
+        """
+        key = (asset_name, interval)
+        _, shared = _top_up_flights.do(key, lambda: self._fetch_missing(asset_name, interval, start, end))
+        if shared:
+            _top_up_flights.do(key, lambda: self._fetch_missing(asset_name, interval, start, end))
+
+    def _fetch_missing(self, asset_name: str, interval: str, start: datetime, end: datetime):
+        """
+        Compara os candles guardados na janela com os passos esperados do intervalo e busca,
+        numa única chamada (a janela cabe em MAX_CANDLES_PER_FETCH), do primeiro ao último
+        que falta: antes do histórico guardado, buracos no meio e depois do último candle
+        """
+        step = timedelta(seconds=INTERVAL_SECONDS[interval])
+        stored = {
+            _to_naive_utc(open_time)
+            for (open_time,) in self.db.query(Candle.open_time).filter(
+                and_(
+                    Candle.asset_name == asset_name,
+                    Candle.interval == interval,
+                    Candle.open_time >= start,
+                    Candle.open_time <= end
+                )
+            ).all()
+        }
+
+        gaps_key = (asset_name, interval, "gaps")
+        tail_key = (asset_name, interval, "tail")
+
+        # A fonte pode não ter parte da janela (ativo listado depois, período sem negócios):
+        # trechos já tentados não voltam à fonte antes de CANDLE_REFRESH_SECONDS
+        attempted = _recent_top_ups.get(gaps_key)
+        missing = [
+            open_time for open_time in _open_times(start, end, step)
+            if open_time not in stored and (attempted is None or not attempted[0] <= open_time <= attempted[1])
+        ]
+
+        fetch_start, fetch_end = (missing[0], missing[-1]) if missing else (None, None)
+
+        # O último candle guardado pode estar incompleto: busca a partir dele
+        if stored and _recent_top_ups.get(tail_key) is None:
+            last_stored = max(stored)
+            fetch_start = min(fetch_start or last_stored, last_stored)
+            fetch_end = max(fetch_end or end, end)
+
+        if fetch_start is None:
+            return
+
+        try:
+            raw_candles = self.source.get_candles(
+                asset_name, interval, _to_ms(fetch_start), _to_ms(fetch_end)
+            ) or []
+        except Exception as e:
+            # Sem fonte disponível: serve o que já está guardado
+            print(f"⚠️ Erro ao buscar candles de {asset_name} ({interval}): {e}")
+            return
+        self._upsert(asset_name, interval, raw_candles)
+
+        if missing:
+            if attempted is not None:
+                missing = [min(missing[0], attempted[0]), max(missing[-1], attempted[1])]
+            _recent_top_ups.set(gaps_key, (missing[0], missing[-1]))
+        _recent_top_ups.set(tail_key, True)
+
+    def _upsert(self, asset_name: str, interval: str, raw_candles: List[Dict]):
+        if not raw_candles:
+            return
+
+        parsed = {
+            datetime.fromtimestamp(candle["t"] / 1000, tz=timezone.utc).replace(tzinfo=None): candle
+            for candle in raw_candles
+        }
+        # ON CONFLICT: outro worker pode ter gravado os mesmos candles ao mesmo tempo
+        upsert_rows(
+            self.db,
+            Candle,
+            [
+                {
+                    "asset_name": asset_name,
+                    "interval": interval,
+                    "open_time": open_time,
+                    "open": float(candle["o"]),
+                    "high": float(candle["h"]),
+                    "low": float(candle["l"]),
+                    "close": float(candle["c"]),
+                    "volume": float(candle.get("v") or 0.0)
+                }
+                for open_time, candle in sorted(parsed.items())
+            ],
+            conflict_columns=("asset_name", "interval", "open_time")
+        )
+        self.db.commit()
+
+
+def downsample_ohlc(candles: List[Candle], max_points: int) -> List[Dict]:
+    """
+    Agrega candles consecutivos em grupos de tamanho fixo (OHLC: primeira abertura,
+    máxima, mínima, último fechamento, volume somado) até caber em max_points
+    """
+    group_size = max(1, -(-len(candles) // max(max_points, 1)))
+
+    points = []
+    for index in range(0, len(candles), group_size):
+        group = candles[index:index + group_size]
+        close = group[-1].close
+        points.append({
+            "timestamp": _to_naive_utc(group[0].open_time).replace(tzinfo=timezone.utc).isoformat(),
+            "open": group[0].open,
+            "high": max(candle.high for candle in group),
+            "low": min(candle.low for candle in group),
+            "close": close,
+            "price": close,
+            "volume": sum(candle.volume or 0.0 for candle in group)
+        })
+
+    return points
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _open_times(start: datetime, end: datetime, step: timedelta) -> List[datetime]:
+    """Aberturas esperadas dos candles em [start, end] (start já alinhado ao intervalo)"""
+    count = int((end - start) / step) + 1 if end >= start else 0
+    return [start + step * index for index in range(count)]
+
+
+def _floor_time(value: datetime, step: timedelta) -> datetime:
+    seconds = int(step.total_seconds())
+    epoch = int(value.replace(tzinfo=timezone.utc).timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _to_ms(value: datetime) -> int:
+    return int(value.replace(tzinfo=timezone.utc).timestamp() * 1000)
@@ -0,0 +1,44 @@
+# --- dashboard_cache.py ---
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from config import DASHBOARD_CACHE_TTL_SECONDS, DASHBOARD_CACHE_MAX_ENTRIES
+from domain.models import User
+from infrastructure.ttl_cache import TTLCache
+
+# Cache por processo das respostas do dashboard, chave (user_id, data_version, dia UTC, endpoint, período)
+dashboard_cache = TTLCache(ttl_seconds=DASHBOARD_CACHE_TTL_SECONDS, max_entries=DASHBOARD_CACHE_MAX_ENTRIES)
+
+def cached_dashboard_response(user: User, endpoint: str, period: str, factory: Callable[[], Any]) -> Any:
+    """
+    Retorna a resposta em cache ou calcula com factory()
+    A chave usa a mesma versão dos dados e o mesmo dia UTC do ETag (user_data_etag): uma
+    escrita de outro processo (CLIs, outro worker) muda a versão e a resposta antiga deixa
+    de ser servida, mesmo sem invalidate_user_dashboard neste processo.
+    """
+    key = (user.id, user.data_version or 0, datetime.now(timezone.utc).date(), endpoint, period)
+    return dashboard_cache.get_or_set(key, factory, group=user.id)
+
+def invalidate_user_dashboard(user_id: int):
+    """Descarta todas as respostas em cache do usuário (trade, preço ou snapshot novo)"""
+    dashboard_cache.invalidate_group(user_id)
+
+def touch_user_data(db: Session, user_id: int):
+    """
+    Incrementa a versão dos dados do usuário (base dos ETags)
+    Deve entrar na mesma transação da escrita, no último commit, para que um ETag
+    novo nunca aponte para dados ainda não gravados.
+    """
+    touch_users_data(db, [user_id])
+
+def touch_users_data(db: Session, user_ids: Iterable[int]):
+    """touch_user_data para vários usuários num único UPDATE"""
+    db.execute(
+        update(User)
+        .where(User.id.in_(list(user_ids)))
+        .values(data_version=User.data_version + 1, data_updated_at=datetime.now(timezone.utc))
+    )
+
+def dashboard_cache_stats() -> Dict:
+    return dashboard_cache.stats()
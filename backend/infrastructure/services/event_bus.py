@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Hashable, Set
+from config import STREAM_QUEUE_SIZE
+
+class UserEventBus:
+    """
+    Pub/sub em memória por usuário para o stream do dashboard
+    Os publicadores rodam em threads (rotas síncronas, jobs); cada assinante é uma
+    asyncio.Queue consumida no event loop, então a entrega usa call_soon_threadsafe.
+    Vale para um único processo (o deploy roda um worker uvicorn).
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[Hashable, Set["_Subscription"]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: Hashable) -> "_Subscription":
+        subscription = _Subscription(self, user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: "_Subscription"):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id: Hashable) -> bool:
+        with self._lock:
+            return bool(self._subscribers.get(user_id))
+
+    def publish(self, user_id: Hashable, event_type: str, data: Dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        if not subscribers:
+            return
+
+        event = {
+            "type": event_type,
+            "data": data,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        self.published += 1
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "users": len(self._subscribers),
+                "subscriptions": sum(len(subs) for subs in self._subscribers.values()),
+                "published": self.published,
+                "dropped": self.dropped
+            }
+
+class _Subscription:
+    def __init__(self, bus: UserEventBus, user_id: Hashable, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.bus = bus
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, event: Dict):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Event loop já encerrado (cliente desconectou durante o shutdown)
+            pass
+
+    def _put(self, event: Dict):
+        if self.queue.full():
+            # Cliente lento: descarta a fila (e o evento) e pede para recarregar tudo;
+            # o resync já cobre o evento, então a fila nunca recebe dois itens aqui
+            self.bus.dropped += 1
+            while not self.queue.empty():
+                if self.queue.get_nowait()["type"] != "resync":
+                    self.bus.dropped += 1
+            self.queue.put_nowait({
+                "type": "resync",
+                "data": {},
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            })
+            return
+        self.queue.put_nowait(event)
+
+dashboard_events = UserEventBus(queue_size=STREAM_QUEUE_SIZE)
+
+def publish_user_event(user_id: int, event_type: str, data: Dict):
+    """Publica um evento para os streams abertos do usuário (no-op sem assinantes)"""
+    dashboard_events.publish(user_id, event_type, data)
+
+def user_has_stream(user_id: int) -> bool:
+    """Permite pular consultas que só serviriam para montar eventos"""
+    return dashboard_events.has_subscribers(user_id)
@@ -1,6 +1,6 @@
 # --- pnl_calculator.py ---
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, select, true
 from datetime import datetime, timezone
 from typing import Optional, Dict, List
 from domain.models import (
@@ -8,6 +8,11 @@ from domain.models import (
     User, WebhookConfig
 )
 from infrastructure.external.hyperliquid_client import HyperliquidClient
+from infrastructure.services.pnl_rollup import PnlRollup
+from infrastructure.services.dashboard_cache import invalidate_user_dashboard, touch_user_data
+from infrastructure.services.event_bus import publish_user_event, user_has_stream
+from infrastructure.services.unrealized_pnl import commit_mark_prices, parse_mids
+from infrastructure.services.position_book import position_book
 
 class PnlCalculator:
     def __init__(self, db: Session):
@@ -54,10 +59,54 @@ class PnlCalculator:
         # Atualizar resumo PNL
         self._update_pnl_summary(user_id, asset_name)
         
+        # Atualizar rollup diário do dia do trade
+        PnlRollup(self.db).refresh_day(user_id, asset_name, trade.timestamp.date())
+        
+        touch_user_data(self.db, user_id)
         self.db.commit()
+        invalidate_user_dashboard(user_id)
+        if position_book.loaded:
+            position_book.sync(self.db, user_id, asset_name)
+        self._publish_trade_events(trade)
         
         return trade
     
+    def _publish_trade_events(self, trade: WebhookTrade):
+        """Envia o trade e o novo estado da posição para os streams abertos do usuário"""
+        if not user_has_stream(trade.user_id):
+            return
+        
+        publish_user_event(trade.user_id, "trade", {
+            "id": trade.id,
+            "asset_name": trade.asset_name,
+            "trade_type": trade.trade_type,
+            "side": trade.side,
+            "quantity": trade.quantity,
+            "price": trade.price,
+            "usd_value": trade.usd_value,
+            "fees": trade.fees,
+            "timestamp": trade.timestamp.isoformat()
+        })
+        
+        position = self.db.query(WebhookPosition).filter(
+            and_(
+                WebhookPosition.user_id == trade.user_id,
+                WebhookPosition.asset_name == trade.asset_name,
+                WebhookPosition.is_open == True
+            )
+        ).first()
+        
+        publish_user_event(trade.user_id, "position", {
+            "asset_name": trade.asset_name,
+            "is_open": position is not None,
+            "side": position.side if position else None,
+            "quantity": position.quantity if position else 0,
+            "avg_entry_price": position.avg_entry_price if position else 0,
+            "current_price": position.current_price if position else 0,
+            "unrealized_pnl": position.unrealized_pnl if position else 0,
+            "leverage": position.leverage if position else 1
+        })
+    
     def _update_position(self, trade: WebhookTrade):
         """Atualiza a posição baseada no trade"""
         
@@ -335,40 +384,9 @@ class PnlCalculator:
         
         self.db.commit()
     
-    def update_unrealized_pnl(self, user_id: int, client: HyperliquidClient):
-        """Atualiza PNL não realizado de todas as posições abertas"""
-        
-        open_positions = self.db.query(WebhookPosition).filter(
-            and_(
-                WebhookPosition.user_id == user_id,
-                WebhookPosition.is_open == True
-            )
-        ).all()
-        
-        for position in open_positions:
-            try:
-                # Obter preço atual
-                current_price = client.get_asset_price(position.asset_name)
-                if current_price:
-                    position.current_price = current_price
-                    
-                    # Calcular PNL não realizado
-                    if position.side == "LONG":
-                        position.unrealized_pnl = position.quantity * (current_price - position.avg_entry_price)
-                    else:  # SHORT
-                        position.unrealized_pnl = position.quantity * (position.avg_entry_price - current_price)
-                    
-                    position.last_updated = datetime.now(timezone.utc)
-            
-            except Exception as e:
-                print(f"Erro ao atualizar preço para {position.asset_name}: {e}")
-        
-        self.db.commit()
-        
-        # Atualizar resumos PNL
-        assets = set(p.asset_name for p in open_positions)
-        for asset in assets:
-            self._update_pnl_summary(user_id, asset)
+    def update_unrealized_pnl(self, user_id: int, client: HyperliquidClient) -> Dict[int, set]:
+        """Atualiza PNL não realizado de todas as posições abertas (um único all_mids)"""
+        return commit_mark_prices(self.db, parse_mids(client.get_all_mids()), [user_id])
     
     def get_pnl_by_period(
         self, 
@@ -376,28 +394,42 @@ class PnlCalculator:
         start_date: datetime, 
         end_date: datetime
     ) -> Dict:
-        """Obtém PNL por período"""
+        """Obtém PNL por período (agregado no banco, sem carregar trades/posições)"""
         
-        trades = self.db.query(WebhookTrade).filter(
+        trades_stats = select(
+            func.count(WebhookTrade.id).label("total_trades"),
+            func.coalesce(func.sum(WebhookTrade.fees), 0.0).label("total_fees")
+        ).where(
             and_(
                 WebhookTrade.user_id == user_id,
                 WebhookTrade.timestamp >= start_date,
                 WebhookTrade.timestamp <= end_date
             )
-        ).all()
+        ).subquery()
         
-        positions_closed = self.db.query(WebhookPosition).filter(
+        positions_stats = select(
+            func.coalesce(
+                func.sum(WebhookPosition.realized_pnl).filter(WebhookPosition.is_open == False), 0.0
+            ).label("realized_pnl")
+        ).where(
             and_(
                 WebhookPosition.user_id == user_id,
                 WebhookPosition.closed_at >= start_date,
-                WebhookPosition.closed_at <= end_date,
-                WebhookPosition.is_open == False
+                WebhookPosition.closed_at <= end_date
             )
-        ).all()
+        ).subquery()
+        
+        row = self.db.execute(
+            select(
+                trades_stats.c.total_trades,
+                trades_stats.c.total_fees,
+                positions_stats.c.realized_pnl
+            ).select_from(trades_stats.join(positions_stats, true()))
+        ).one()
         
-        total_realized_pnl = sum(p.realized_pnl for p in positions_closed)
-        total_fees = sum(t.fees for t in trades)
-        total_trades = len(trades)
+        total_realized_pnl = float(row.realized_pnl or 0.0)
+        total_fees = float(row.total_fees or 0.0)
+        total_trades = int(row.total_trades or 0)
         
         return {
             "period_pnl": total_realized_pnl - total_fees,
@@ -420,11 +452,24 @@ class PnlCalculator:
         
         for (asset_name,) in assets:
             print(f"\n📊 Recalculando PNL para {asset_name}...")
-            self._reprocess_asset_trades(user_id, asset_name)
-            self._update_pnl_summary(user_id, asset_name)
-        
+            self.recalculate_asset_pnl(user_id, asset_name)
+
         print(f"✅ Recálculo completo para {len(assets)} assets")
-    
+
+    def recalculate_asset_pnl(self, user_id: int, asset_name: str):
+        """
+        Recalcula posições e resumo de PNL de um único ativo do usuário
+        Unidade de trabalho usada pelo rebuild paralelo (cli/rebuild_pnl.py)
+        """
+        self._reprocess_asset_trades(user_id, asset_name)
+        self._update_pnl_summary(user_id, asset_name)
+        PnlRollup(self.db).rebuild_asset(user_id, asset_name)
+        touch_user_data(self.db, user_id)
+        self.db.commit()
+        invalidate_user_dashboard(user_id)
+        if position_book.loaded:
+            position_book.sync(self.db, user_id, asset_name)
+
     def _reprocess_asset_trades(self, user_id: int, asset_name: str):
         """
         Reprocessa todos os trades de um ativo para corrigir posições que não foram calculadas corretamente
@@ -0,0 +1,189 @@
+# --- pnl_rollup.py ---
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, func, select
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Dict, List
+from domain.models import WebhookTrade, WebhookPosition, PnlDaily
+from infrastructure.services.dashboard_cache import touch_user_data
+from infrastructure.upsert import upsert_rows
+
+class PnlRollup:
+    """
+    Mantém a tabela pnl_daily (usuário, ativo, dia UTC)
+    - realized_pnl / vitórias / derrotas: posições fechadas no dia
+    - fees / volume / trade_count: trades executados no dia
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh_day(self, user_id: int, asset_name: str, day: date):
+        """Recalcula a linha de um único dia (chamado a cada trade registrado)"""
+        start = datetime.combine(day, time.min).replace(tzinfo=timezone.utc)
+        self._refresh_range(user_id, asset_name, start, start + timedelta(days=1))
+
+    def rebuild_asset(self, user_id: int, asset_name: str):
+        """Recalcula todo o histórico de um ativo (backfill / após reprocessar posições)"""
+        self._refresh_range(user_id, asset_name, None, None)
+
+    def backfill(self, user_ids: Optional[List[int]] = None, assets: Optional[List[str]] = None) -> int:
+        """Reconstrói o rollup para todos os pares (usuário, ativo) com trades"""
+        query = self.db.query(WebhookTrade.user_id, WebhookTrade.asset_name).distinct()
+        if user_ids:
+            query = query.filter(WebhookTrade.user_id.in_(user_ids))
+        if assets:
+            query = query.filter(WebhookTrade.asset_name.in_(assets))
+
+        partitions = sorted(query.all())
+        for user_id, asset_name in partitions:
+            self.rebuild_asset(user_id, asset_name)
+            touch_user_data(self.db, user_id)
+            self.db.commit()
+
+        return len(partitions)
+
+    def get_period_pnl(self, user_id: int, start_day: date, end_day: date) -> Dict:
+        """Obtém PNL de um intervalo de dias (inclusivo) somando o rollup"""
+        row = self.db.execute(
+            select(
+                func.coalesce(func.sum(PnlDaily.realized_pnl), 0.0).label("realized_pnl"),
+                func.coalesce(func.sum(PnlDaily.fees), 0.0).label("total_fees"),
+                func.coalesce(func.sum(PnlDaily.trade_count), 0).label("total_trades")
+            ).where(
+                and_(
+                    PnlDaily.user_id == user_id,
+                    PnlDaily.day >= start_day,
+                    PnlDaily.day <= end_day
+                )
+            )
+        ).one()
+
+        total_realized_pnl = float(row.realized_pnl or 0.0)
+        total_fees = float(row.total_fees or 0.0)
+
+        return {
+            "period_pnl": total_realized_pnl - total_fees,
+            "period_trades": int(row.total_trades or 0),
+            "total_fees": total_fees,
+            "realized_pnl": total_realized_pnl
+        }
+
+    def get_daily_series(self, user_id: int, start_day: date, end_day: date) -> List[Dict]:
+        """PNL líquido (realizado - taxas) por dia, somando todos os ativos"""
+        net_pnl = func.sum(PnlDaily.realized_pnl - PnlDaily.fees)
+        rows = self.db.execute(
+            select(
+                PnlDaily.day,
+                func.coalesce(net_pnl, 0.0).label("pnl"),
+                func.coalesce(func.sum(PnlDaily.trade_count), 0).label("trades")
+            ).where(
+                and_(
+                    PnlDaily.user_id == user_id,
+                    PnlDaily.day >= start_day,
+                    PnlDaily.day <= end_day
+                )
+            ).group_by(PnlDaily.day).order_by(PnlDaily.day)
+        ).all()
+
+        return [
+            {"day": _to_date(row.day), "pnl": float(row.pnl or 0.0), "trades": int(row.trades or 0)}
+            for row in rows
+        ]
+
+    def _refresh_range(self, user_id: int, asset_name: str, start: Optional[datetime], end: Optional[datetime]):
+        aggregated = self._aggregate(user_id, asset_name, start, end)
+        now = datetime.now(timezone.utc)
+
+        # Upsert: dois webhooks do mesmo usuário/ativo num dia ainda sem linha não colidem na chave única
+        upsert_rows(
+            self.db,
+            PnlDaily,
+            [
+                {"user_id": user_id, "asset_name": asset_name, "day": day, **values, "last_updated": now}
+                for day, values in sorted(aggregated.items())
+            ],
+            conflict_columns=("user_id", "asset_name", "day")
+        )
+
+        # Dias que deixaram de ter atividade (ex: após reprocessamento)
+        filters = [PnlDaily.user_id == user_id, PnlDaily.asset_name == asset_name]
+        if start is not None:
+            filters.append(PnlDaily.day >= start.date())
+        if end is not None:
+            filters.append(PnlDaily.day < end.date())
+        if aggregated:
+            filters.append(PnlDaily.day.notin_(list(aggregated)))
+        self.db.execute(delete(PnlDaily).where(and_(*filters)).execution_options(synchronize_session=False))
+
+    def _aggregate(self, user_id: int, asset_name: str, start: Optional[datetime], end: Optional[datetime]) -> Dict[date, Dict]:
+        trade_day = func.date(WebhookTrade.timestamp)
+        trade_filters = [WebhookTrade.user_id == user_id, WebhookTrade.asset_name == asset_name]
+
+        position_day = func.date(WebhookPosition.closed_at)
+        position_filters = [
+            WebhookPosition.user_id == user_id,
+            WebhookPosition.asset_name == asset_name,
+            WebhookPosition.is_open == False,
+            WebhookPosition.closed_at.isnot(None)
+        ]
+
+        if start is not None:
+            trade_filters.append(WebhookTrade.timestamp >= start)
+            position_filters.append(WebhookPosition.closed_at >= start)
+        if end is not None:
+            trade_filters.append(WebhookTrade.timestamp < end)
+            position_filters.append(WebhookPosition.closed_at < end)
+
+        trade_rows = self.db.execute(
+            select(
+                trade_day.label("day"),
+                func.count(WebhookTrade.id).label("trade_count"),
+                func.coalesce(func.sum(WebhookTrade.fees), 0.0).label("fees"),
+                func.coalesce(func.sum(WebhookTrade.usd_value), 0.0).label("volume")
+            ).where(and_(*trade_filters)).group_by(trade_day)
+        ).all()
+
+        position_rows = self.db.execute(
+            select(
+                position_day.label("day"),
+                func.coalesce(func.sum(WebhookPosition.realized_pnl), 0.0).label("realized_pnl"),
+                func.count(WebhookPosition.id).filter(WebhookPosition.realized_pnl > 0).label("winning_trades"),
+                func.count(WebhookPosition.id).filter(WebhookPosition.realized_pnl < 0).label("losing_trades")
+            ).where(and_(*position_filters)).group_by(position_day)
+        ).all()
+
+        days: Dict[date, Dict] = {}
+
+        for row in trade_rows:
+            values = days.setdefault(_to_date(row.day), _empty_values())
+            values["trade_count"] = int(row.trade_count or 0)
+            values["fees"] = float(row.fees or 0.0)
+            values["volume"] = float(row.volume or 0.0)
+
+        for row in position_rows:
+            values = days.setdefault(_to_date(row.day), _empty_values())
+            values["realized_pnl"] = float(row.realized_pnl or 0.0)
+            values["winning_trades"] = int(row.winning_trades or 0)
+            values["losing_trades"] = int(row.losing_trades or 0)
+
+        return days
+
+
+def _empty_values() -> Dict:
+    return {
+        "realized_pnl": 0.0,
+        "fees": 0.0,
+        "volume": 0.0,
+        "trade_count": 0,
+        "winning_trades": 0,
+        "losing_trades": 0
+    }
+
+
+def _to_date(value) -> date:
+    """func.date() devolve date no PostgreSQL e string 'YYYY-MM-DD' no SQLite"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
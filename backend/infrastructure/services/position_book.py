@@ -0,0 +1,234 @@
+# --- position_book.py ---
+import threading
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+from domain.models import WebhookPosition
+from infrastructure.services.unrealized_pnl import commit_mark_prices
+
+POSITION_COLUMNS = (
+    WebhookPosition.id,
+    WebhookPosition.user_id,
+    WebhookPosition.asset_name,
+    WebhookPosition.side,
+    WebhookPosition.quantity,
+    WebhookPosition.avg_entry_price,
+    WebhookPosition.current_price,
+    WebhookPosition.leverage,
+)
+
+class PositionBook:
+    """
+    Livro em memória das posições abertas de todos os usuários
+    - colunas numéricas em array('d') paralelos (um slot por posição), índices por ativo e por usuário
+    - apply_mids reavalia PnL e distância de liquidação a cada tick de preço
+    - flush grava no banco só os ativos cujo preço mudou desde a última gravação
+    O banco continua sendo a fonte da verdade: record_trade chama sync() depois do commit.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids: List[int] = []
+        self._users = array("q")
+        self._assets: List[str] = []
+        self._signs = array("b")
+        self._quantity = array("d")
+        self._entry = array("d")
+        self._leverage = array("d")
+        self._mark = array("d")
+        self._unrealized = array("d")
+        self._slot_by_id: Dict[int, int] = {}
+        self._slots_by_asset: Dict[str, Set[int]] = {}
+        self._slots_by_user: Dict[int, Set[int]] = {}
+        self._prices: Dict[str, float] = {}
+        self._dirty_assets: Set[str] = set()
+        self.loaded = False
+        self.ticks = 0
+        self.flushes = 0
+        self.last_tick_at: Optional[datetime] = None
+        self.last_flush_at: Optional[datetime] = None
+
+    def load(self, db: Session):
+        """Carrega todas as posições abertas (startup)"""
+        rows = db.execute(select(*POSITION_COLUMNS).where(WebhookPosition.is_open == True)).all()
+        with self._lock:
+            self._clear()
+            for row in rows:
+                self._add(row)
+            self.loaded = True
+        print(f"📒 Livro de posições carregado: {len(rows)} posições abertas")
+
+    def sync(self, db: Session, user_id: int, asset_name: str):
+        """Recarrega as posições abertas de um usuário/ativo a partir do banco (após trades)"""
+        rows = db.execute(
+            select(*POSITION_COLUMNS).where(
+                and_(
+                    WebhookPosition.user_id == user_id,
+                    WebhookPosition.asset_name == asset_name,
+                    WebhookPosition.is_open == True
+                )
+            )
+        ).all()
+        with self._lock:
+            stale = [
+                self._ids[slot] for slot in self._slots_by_user.get(user_id, ())
+                if self._assets[slot] == asset_name
+            ]
+            for position_id in stale:
+                self._remove(position_id)
+            for row in rows:
+                self._add(row)
+            if rows and asset_name in self._prices:
+                self._dirty_assets.add(asset_name)
+
+    def apply_mids(self, prices: Dict[str, float]) -> int:
+        """Reavalia as posições dos ativos cujo preço mudou; retorna quantas foram reavaliadas"""
+        revalued = 0
+        with self._lock:
+            for asset_name, price in prices.items():
+                if self._prices.get(asset_name) == price:
+                    continue
+                self._prices[asset_name] = price
+                slots = self._slots_by_asset.get(asset_name)
+                if not slots:
+                    continue
+                for slot in slots:
+                    self._revalue(slot, price)
+                revalued += len(slots)
+                self._dirty_assets.add(asset_name)
+            self.ticks += 1
+            self.last_tick_at = datetime.now(timezone.utc)
+        return revalued
+
+    def user_positions(self, user_id: int) -> List[Dict]:
+        with self._lock:
+            return [self._position_dict(slot) for slot in sorted(self._slots_by_user.get(user_id, ()))]
+
+    def flush(self, db: Session) -> Dict[int, Set[str]]:
+        """Persiste os preços marcados desde a última gravação (um UPDATE em lote por passada)"""
+        with self._lock:
+            prices = {asset_name: self._prices[asset_name] for asset_name in self._dirty_assets}
+            self._dirty_assets.clear()
+        if not prices:
+            return {}
+
+        try:
+            affected = commit_mark_prices(db, prices)
+        except Exception:
+            with self._lock:
+                self._dirty_assets.update(prices)
+            raise
+        self.flushes += 1
+        self.last_flush_at = datetime.now(timezone.utc)
+        return affected
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "positions": len(self._ids),
+                "users": len(self._slots_by_user),
+                "assets": len(self._slots_by_asset),
+                "priced_assets": len(self._prices),
+                "dirty_assets": len(self._dirty_assets),
+                "ticks": self.ticks,
+                "flushes": self.flushes,
+                "last_tick_at": self.last_tick_at.isoformat() if self.last_tick_at else None,
+                "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None
+            }
+
+    def _position_dict(self, slot: int) -> Dict:
+        mark = self._mark[slot]
+        sign = self._signs[slot]
+        liquidation_price = _liquidation_price(self._entry[slot], sign, self._leverage[slot])
+        distance = sign * (mark - liquidation_price) / mark * 100 if mark > 0 else None
+        return {
+            "id": self._ids[slot],
+            "asset_name": self._assets[slot],
+            "side": "LONG" if sign > 0 else "SHORT",
+            "quantity": self._quantity[slot],
+            "avg_entry_price": self._entry[slot],
+            "current_price": mark if mark > 0 else None,
+            "unrealized_pnl": self._unrealized[slot],
+            "leverage": self._leverage[slot],
+            "liquidation_price": liquidation_price,
+            "liquidation_distance_pct": distance
+        }
+
+    def _revalue(self, slot: int, price: float):
+        self._mark[slot] = price
+        self._unrealized[slot] = self._signs[slot] * self._quantity[slot] * (price - self._entry[slot])
+
+    def _add(self, row):
+        if row.id in self._slot_by_id:
+            self._remove(row.id)
+        slot = len(self._ids)
+        self._ids.append(row.id)
+        self._users.append(row.user_id)
+        self._assets.append(row.asset_name)
+        self._signs.append(1 if row.side == "LONG" else -1)
+        self._quantity.append(row.quantity or 0.0)
+        self._entry.append(row.avg_entry_price or 0.0)
+        self._leverage.append(float(row.leverage or 1))
+        self._mark.append(0.0)
+        self._unrealized.append(0.0)
+        self._slot_by_id[row.id] = slot
+        self._slots_by_asset.setdefault(row.asset_name, set()).add(slot)
+        self._slots_by_user.setdefault(row.user_id, set()).add(slot)
+
+        price = self._prices.get(row.asset_name) or row.current_price
+        if price:
+            self._revalue(slot, price)
+
+    def _remove(self, position_id: int):
+        """Remove trocando o slot pelo último (arrays continuam compactos)"""
+        slot = self._slot_by_id.pop(position_id)
+        last = len(self._ids) - 1
+        self._unindex(slot)
+        if slot != last:
+            self._unindex(last)
+            for column in self._columns():
+                column[slot] = column[last]
+            self._slot_by_id[self._ids[slot]] = slot
+            self._index(slot)
+        for column in self._columns():
+            column.pop()
+
+    def _index(self, slot: int):
+        self._slots_by_asset.setdefault(self._assets[slot], set()).add(slot)
+        self._slots_by_user.setdefault(self._users[slot], set()).add(slot)
+
+    def _unindex(self, slot: int):
+        for index, key in ((self._slots_by_asset, self._assets[slot]), (self._slots_by_user, self._users[slot])):
+            slots = index.get(key)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del index[key]
+
+    def _columns(self):
+        return (
+            self._ids, self._users, self._assets, self._signs, self._quantity,
+            self._entry, self._leverage, self._mark, self._unrealized
+        )
+
+    def _clear(self):
+        for column in self._columns():
+            del column[:]
+        self._slot_by_id.clear()
+        self._slots_by_asset.clear()
+        self._slots_by_user.clear()
+        self._dirty_assets.clear()
+
+
+def _liquidation_price(entry_price: float, sign: int, leverage: float) -> float:
+    """
+    Preço de liquidação aproximado (margem isolada, sem margem de manutenção)
+    LONG: entrada * (1 - 1/alavancagem); SHORT: entrada * (1 + 1/alavancagem)
+    """
+    return entry_price * (1 - sign / max(leverage, 1.0))
+
+
+position_book = PositionBook()
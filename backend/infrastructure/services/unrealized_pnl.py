@@ -0,0 +1,195 @@
+# --- unrealized_pnl.py ---
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Set
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session
+from domain.models import WebhookPnlSummary, WebhookPosition
+from infrastructure.database import SessionLocal
+from infrastructure.services.dashboard_cache import invalidate_user_dashboard, touch_users_data
+from infrastructure.services.event_bus import publish_user_event, user_has_stream
+
+def parse_mids(mids: Dict) -> Dict[str, float]:
+    """Converte a resposta de all_mids ({"BTC": "64000.5", ...}) descartando preços inválidos"""
+    prices = {}
+    for asset_name, price in (mids or {}).items():
+        try:
+            value = float(price)
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            prices[asset_name] = value
+    return prices
+
+def apply_mark_prices(db: Session, prices: Dict[str, float], user_ids: Optional[List[int]] = None) -> Dict[int, Set[str]]:
+    """
+    Reavalia as posições abertas com um único conjunto de preços
+    - um UPDATE em lote: current_price e unrealized_pnl calculados no banco via CASE por ativo
+    - só toca posições cujo preço mudou
+    - resumos atualizados de forma incremental (só total_unrealized_pnl e net_pnl)
+    Não faz commit; retorna {user_id: {ativos afetados}}.
+    """
+    if not prices:
+        return {}
+
+    price = case(prices, value=WebhookPosition.asset_name)
+    conditions = [
+        WebhookPosition.is_open == True,
+        WebhookPosition.asset_name.in_(list(prices)),
+        or_(WebhookPosition.current_price.is_(None), WebhookPosition.current_price != price)
+    ]
+    if user_ids is not None:
+        conditions.append(WebhookPosition.user_id.in_(user_ids))
+
+    affected: Dict[int, Set[str]] = defaultdict(set)
+    for user_id, asset_name in db.execute(
+        select(WebhookPosition.user_id, WebhookPosition.asset_name).where(and_(*conditions)).distinct()
+    ):
+        affected[user_id].add(asset_name)
+    if not affected:
+        return {}
+
+    db.execute(
+        update(WebhookPosition)
+        .where(and_(*conditions))
+        .values(
+            current_price=price,
+            unrealized_pnl=case(
+                (WebhookPosition.side == "LONG", WebhookPosition.quantity * (price - WebhookPosition.avg_entry_price)),
+                else_=WebhookPosition.quantity * (WebhookPosition.avg_entry_price - price)
+            ),
+            last_updated=datetime.now(timezone.utc)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    _refresh_summaries_unrealized(db, affected)
+    return dict(affected)
+
+def _refresh_summaries_unrealized(db: Session, affected: Dict[int, Set[str]]):
+    """Recalcula só o não realizado dos resumos afetados (sem reler trades nem refazer win rate)"""
+    open_unrealized = select(
+        func.coalesce(func.sum(WebhookPosition.unrealized_pnl), 0.0)
+    ).where(
+        and_(
+            WebhookPosition.user_id == WebhookPnlSummary.user_id,
+            WebhookPosition.asset_name == WebhookPnlSummary.asset_name,
+            WebhookPosition.is_open == True
+        )
+    ).scalar_subquery()
+
+    pairs = [(user_id, asset_name) for user_id, assets in affected.items() for asset_name in assets]
+    db.execute(
+        update(WebhookPnlSummary)
+        .where(or_(*(
+            and_(WebhookPnlSummary.user_id == user_id, WebhookPnlSummary.asset_name == asset_name)
+            for user_id, asset_name in pairs
+        )))
+        .values(
+            total_unrealized_pnl=open_unrealized,
+            net_pnl=(
+                func.coalesce(WebhookPnlSummary.total_realized_pnl, 0.0)
+                + open_unrealized
+                - func.coalesce(WebhookPnlSummary.total_fees, 0.0)
+            ),
+            last_updated=datetime.now(timezone.utc)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def publish_pnl_events(db: Session, user_ids: List[int]):
+    """Evento "pnl" para quem está com o stream aberto (uma consulta para todos)"""
+    streaming = [user_id for user_id in user_ids if user_has_stream(user_id)]
+    if not streaming:
+        return
+
+    positions: Dict[int, List[Dict]] = defaultdict(list)
+    for row in db.execute(
+        select(
+            WebhookPosition.user_id,
+            WebhookPosition.asset_name,
+            WebhookPosition.current_price,
+            WebhookPosition.unrealized_pnl
+        ).where(and_(WebhookPosition.user_id.in_(streaming), WebhookPosition.is_open == True))
+    ):
+        positions[row.user_id].append({
+            "asset_name": row.asset_name,
+            "current_price": row.current_price,
+            "unrealized_pnl": row.unrealized_pnl
+        })
+
+    for user_id in streaming:
+        user_positions = positions.get(user_id, [])
+        publish_user_event(user_id, "pnl", {
+            "positions": user_positions,
+            "total_unrealized_pnl": sum(position["unrealized_pnl"] or 0.0 for position in user_positions)
+        })
+
+def commit_mark_prices(db: Session, prices: Dict[str, float], user_ids: Optional[List[int]] = None) -> Dict[int, Set[str]]:
+    """apply_mark_prices + versão dos dados, commit, invalidação de cache e eventos"""
+    affected = apply_mark_prices(db, prices, user_ids)
+    if affected:
+        touch_users_data(db, list(affected))
+    db.commit()
+
+    for user_id in affected:
+        invalidate_user_dashboard(user_id)
+    publish_pnl_events(db, list(affected))
+    return affected
+
+class UnrealizedPnlUpdater:
+    """
+    Atualização periódica do PnL não realizado de todos os usuários
+    Um único all_mids por passada, independente de quantas posições estão abertas.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        client_factory: Optional[Callable[[], object]] = None
+    ):
+        self.session_factory = session_factory
+        self.client_factory = client_factory or _default_client
+        self._client = None
+        self.last_result: Optional[Dict] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    def run_once(self) -> Dict:
+        started = time.monotonic()
+        db = self.session_factory()
+        try:
+            open_assets = [
+                asset_name for (asset_name,) in db.execute(
+                    select(WebhookPosition.asset_name).where(WebhookPosition.is_open == True).distinct()
+                )
+            ]
+            if not open_assets:
+                self.last_result = {"assets": 0, "users": 0, "positions_assets": 0, "duration_seconds": 0.0}
+                return self.last_result
+
+            prices = parse_mids(self.client.get_all_mids())
+            prices = {asset_name: prices[asset_name] for asset_name in open_assets if asset_name in prices}
+            affected = commit_mark_prices(db, prices)
+
+            self.last_result = {
+                "assets": len(prices),
+                "missing_prices": sorted(set(open_assets) - set(prices)),
+                "users": len(affected),
+                "positions_assets": sum(len(assets) for assets in affected.values()),
+                "duration_seconds": round(time.monotonic() - started, 3)
+            }
+            print(f"💹 PnL não realizado: {self.last_result}")
+            return self.last_result
+        finally:
+            db.close()
+
+
+def _default_client():
+    from infrastructure.external.hyperliquid_client import HyperliquidClient
+    return HyperliquidClient()
@@ -0,0 +1,215 @@
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import orjson
+from config import SHARED_CACHE_PATH, SHARED_CACHE_LEASE_SECONDS, SHARED_CACHE_WAIT_SECONDS
+from infrastructure.ttl_cache import SingleFlight
+
+# Intervalo entre leituras do arquivo enquanto outro worker atualiza a chave
+LEASE_POLL_SECONDS = 0.05
+
+class SharedCache:
+    """
+    Cache de dois níveis compartilhado entre os workers do uvicorn
+    - nível 1: dicionário em memória do processo
+    - nível 2: arquivo SQLite (WAL) lido/escrito por todos os workers da máquina
+    Entradas têm idade (stored_at): até fresh_seconds são servidas direto; até
+    fresh_seconds + stale_seconds são servidas enquanto uma única atualização roda em
+    segundo plano (stale-while-revalidate). Sem valor utilizável, a chamada espera.
+    Um único atualizador por chave: singleflight dentro do processo e lease no SQLite
+    entre processos (os demais esperam o valor novo aparecer no arquivo).
+    Valores precisam ser serializáveis em JSON (orjson). Falhas do SQLite só desativam o nível 2.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str] = None,
+        lease_seconds: float = 30.0,
+        wait_seconds: float = 5.0
+    ):
+        self.name = name
+        self.path = path or None
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self._holder = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._refreshing: set = set()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"cache-{name}")
+        self._connections = threading.local()
+        self._counters = {
+            "local_hits": 0,
+            "shared_hits": 0,
+            "stale_served": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "lease_waits": 0,
+            "shared_errors": 0
+        }
+
+    def get(self, key: str, loader: Callable[[], Any], fresh_seconds: float, stale_seconds: float = 0.0) -> Any:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < fresh_seconds:
+            self._count("local_hits")
+            return entry[1]
+
+        shared = self._read_shared(key, newer_than=entry[0] if entry else 0.0)
+        if shared is not None:
+            entry = self._keep_local(key, shared)
+            if now - entry[0] < fresh_seconds:
+                self._count("shared_hits")
+                return entry[1]
+
+        if entry is not None and now - entry[0] < fresh_seconds + stale_seconds:
+            self._count("stale_served")
+            self._refresh_in_background(key, loader)
+            return entry[1]
+
+        self._count("misses")
+        value, _ = self._flights.do(key, lambda: self._refresh(key, loader, since=entry[0] if entry else 0.0))
+        return value
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+        self._execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "path": self.path,
+                "local_entries": len(self._entries),
+                "refreshing": len(self._refreshing),
+                **self._counters
+            }
+
+    def _refresh(self, key: str, loader: Callable[[], Any], since: float) -> Any:
+        """Atualiza a chave; se outro worker tiver o lease, espera o valor dele no arquivo"""
+        if not self._acquire_lease(key):
+            self._count("lease_waits")
+            deadline = time.monotonic() + self.wait_seconds
+            while time.monotonic() < deadline:
+                time.sleep(LEASE_POLL_SECONDS)
+                shared = self._read_shared(key, newer_than=since)
+                if shared is not None:
+                    return self._keep_local(key, shared)[1]
+            # O worker com o lease travou ou morreu: busca por conta própria
+        return self._load(key, loader)
+
+    def _load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Chama loader() com o lease já obtido, grava nos dois níveis e libera o lease"""
+        try:
+            self._count("refreshes")
+            value = loader()
+            stored_at = time.time()
+            self._keep_local(key, (stored_at, value))
+            self._execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, orjson.dumps(value), stored_at)
+            )
+            return value
+        except Exception:
+            self._count("refresh_errors")
+            raise
+        finally:
+            self._execute("DELETE FROM cache_leases WHERE key = ? AND holder = ?", (key, self._holder))
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        # Copia o contexto (prioridade da API) da requisição que disparou a atualização
+        context = contextvars.copy_context()
+        self._pool.submit(context.run, self._background_refresh, key, loader)
+
+    def _background_refresh(self, key: str, loader: Callable[[], Any]):
+        try:
+            # Outro worker já está atualizando: o valor novo chega pelo arquivo
+            if self._acquire_lease(key):
+                self._flights.do(key, lambda: self._load(key, loader))
+        except Exception as e:
+            print(f"⚠️ Cache '{self.name}': falha ao atualizar '{key}' em segundo plano (servindo valor antigo): {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _acquire_lease(self, key: str) -> bool:
+        """Lease entre processos; sem o nível 2 (ou com erro no SQLite) sempre concede"""
+        now = time.time()
+        cursor = self._execute(
+            "INSERT INTO cache_leases (key, holder, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+            "WHERE cache_leases.expires_at < ? OR cache_leases.holder = excluded.holder",
+            (key, self._holder, now + self.lease_seconds, now)
+        )
+        return cursor is None or cursor.rowcount > 0
+
+    def _keep_local(self, key: str, entry: Tuple[float, Any]) -> Tuple[float, Any]:
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or entry[0] >= current[0]:
+                self._entries[key] = entry
+                return entry
+            return current
+
+    def _read_shared(self, key: str, newer_than: float = 0.0) -> Optional[Tuple[float, Any]]:
+        """Lê do arquivo só se for mais novo que a cópia local (evita desserializar à toa)"""
+        cursor = self._execute(
+            "SELECT stored_at, value FROM cache_entries WHERE key = ? AND stored_at > ?", (key, newer_than)
+        )
+        row = cursor.fetchone() if cursor is not None else None
+        if row is None:
+            return None
+        try:
+            return row[0], orjson.loads(row[1])
+        except orjson.JSONDecodeError:
+            return None
+
+    def _execute(self, sql: str, parameters: tuple) -> Optional[sqlite3.Cursor]:
+        if self.path is None:
+            return None
+        try:
+            return self._connection().execute(sql, parameters)
+        except sqlite3.Error as e:
+            self._count("shared_errors")
+            print(f"⚠️ Cache '{self.name}': erro no SQLite ({e}); usando só a memória do processo")
+            return None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._connections, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.wait_seconds, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_leases (key TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._connections.connection = connection
+        return connection
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+
+# Dados de mercado compartilhados (lista de ativos, meta, regras dos ativos)
+market_cache = SharedCache(
+    "market",
+    path=SHARED_CACHE_PATH,
+    lease_seconds=SHARED_CACHE_LEASE_SECONDS,
+    wait_seconds=SHARED_CACHE_WAIT_SECONDS
+)
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Cache em memória limitado (LRU) com expiração por TTL e contadores de uso
+
+    Invalidação por grupo: cada entrada guarda a "geração" do seu grupo (ex: user_id)
+    no momento em que o valor começou a ser calculado. invalidate_group() só incrementa
+    a geração, então entradas antigas - inclusive as que estavam sendo calculadas durante
+    a invalidação - deixam de ser servidas sem precisar varrer o cache.
+
+    get_or_set faz singleflight: chamadas concorrentes para a mesma chave (e mesma
+    geração) esperam o cálculo em andamento em vez de repetir factory().
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._get_locked(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, group: Hashable = None, generation: Optional[int] = None):
+        with self._lock:
+            current = self._generations.get(group, 0)
+            if generation is not None and generation != current:
+                # O grupo foi invalidado enquanto o valor era calculado
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, current, group, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any], group: Hashable = None) -> Any:
+        """Retorna o valor em cache ou calcula com factory() e guarda (exceções não são cacheadas)"""
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            generation = self._generations.get(group, 0)
+
+        def compute():
+            value = factory()
+            self.set(key, value, group=group, generation=generation)
+            return value
+
+        value, shared = self._flights.do((key, generation), compute)
+        with self._lock:
+            if shared:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+        return value
+
+    def invalidate_group(self, group: Hashable):
+        with self._lock:
+            self._generations[group] = self._generations.get(group, 0) + 1
+            self.invalidations += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    def _get_locked(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        expires_at, generation, entry_group, value = entry
+        if expires_at <= time.monotonic() or generation != self._generations.get(entry_group, 0):
+            del self._entries[key]
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+class SingleFlight:
+    """
+    Deduplica chamadas concorrentes: enquanto fn() de uma chave está rodando, outras
+    chamadas com a mesma chave esperam e recebem o mesmo resultado (ou a mesma exceção)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, "_InFlight"] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Retorna (valor, compartilhado); compartilhado=True quando outra chamada fez o trabalho"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = self._calls[key] = _InFlight()
+                leader = True
+
+        if not leader:
+            return call.wait(), True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+class _InFlight:
+    """Cálculo em andamento compartilhado pelas chamadas concorrentes da mesma chave"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
@@ -0,0 +1,32 @@
+from typing import Dict, List, Sequence
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Linhas por INSERT: mantém o número de parâmetros abaixo do limite do SQLite (32766)
+UPSERT_CHUNK_ROWS = 1000
+
+def upsert_rows(db: Session, model, rows: List[Dict], conflict_columns: Sequence[str]):
+    """
+    INSERT ... ON CONFLICT (conflict_columns) DO UPDATE com as demais colunas das linhas
+    Seguro com escritores concorrentes na mesma chave única (o último a gravar vence,
+    sem IntegrityError). PostgreSQL em produção, SQLite em desenvolvimento.
+    """
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"Upsert não suportado para o banco {dialect}")
+
+    update_columns = [column for column in rows[0] if column not in conflict_columns]
+    for index in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        statement = insert(model).values(rows[index:index + UPSERT_CHUNK_ROWS])
+        statement = statement.on_conflict_do_update(
+            index_elements=list(conflict_columns),
+            set_={column: statement.excluded[column] for column in update_columns}
+        )
+        db.execute(statement)
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+from application.use_cases.ops_use_cases import (
+    get_cache_stats, get_stream_stats, get_background_jobs_stats, get_database_pool_stats
+)
+from infrastructure.security import get_admin_user
+
+# Métricas internas do processo: só para administradores (ADMIN_EMAILS)
+router = APIRouter(prefix="/api/ops", tags=["ops"], dependencies=[Depends(get_admin_user)])
+
+@router.get("/cache/stats")
+def cache_statistics():
+    """Caches do processo: respostas do dashboard, user_state, coalescência do /info e dados de mercado"""
+    return get_cache_stats()
+
+@router.get("/stream/stats")
+def stream_statistics():
+    """Quantidade de streams abertos e eventos publicados/descartados"""
+    return get_stream_stats()
+
+@router.get("/jobs/stats")
+def background_jobs_statistics():
+    """Jobs em segundo plano, livro de posições e chamadas à Hyperliquid"""
+    return get_background_jobs_stats()
+
+@router.get("/db/stats")
+def database_pool_statistics():
+    """Pool de conexões do banco: conexões em uso, saturação e espera no checkout"""
+    return get_database_pool_stats()
@@ -1,6 +1,9 @@
 from typing import List, Optional
 from datetime import date
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from domain.models import User
 from domain.schemas import (
@@ -8,31 +11,40 @@ from domain.schemas import (
     WebhookPositionResponse, PnlPeriodRequest, AccountSnapshotResponse
 )
 from application.use_cases.pnl_use_cases import (
-    get_dashboard_summary, get_assets_performance, get_asset_detailed_performance,
+    get_dashboard_summary, get_dashboard_data, get_assets_performance, get_asset_detailed_performance,
+    get_asset_trades, get_asset_positions_history, get_asset_price_history,
     get_asset_webhook_executions, get_webhook_execution_details, get_pnl_by_period,
     get_user_trades, get_user_positions, update_unrealized_pnl, create_account_snapshot,
-    get_account_snapshots, recalculate_user_pnl
+    get_account_snapshots, recalculate_user_pnl, get_equity_curve,
+    get_stream_user_id, issue_stream_ticket, dashboard_event_stream,
+    get_position_book
 )
 from infrastructure.security import get_current_user
 from infrastructure.database import get_db
+from infrastructure.pagination import set_pagination_headers
+from infrastructure.http_cache import user_data_etag
+from infrastructure.fast_json import fast_json_response
+from infrastructure.external.rate_limiter import low_api_priority
 
-router = APIRouter(prefix="/api/dashboard", tags=["pnl"])
+router = APIRouter(prefix="/api/dashboard", tags=["pnl"], dependencies=[Depends(low_api_priority)])
 
-@router.get("/")
+# Sub-recursos de histórico aceitam format=columnar (arrays paralelos em vez de objetos)
+RESPONSE_FORMAT_PATTERN = "^(rows|columnar)$"
+RESPONSE_FORMAT_DESCRIPTION = "rows (lista de objetos) ou columnar (arrays paralelos por campo)"
+
+# No stream o token também pode vir por query string (EventSource não envia headers)
+optional_bearer = HTTPBearer(auto_error=False)
+
+@router.get("/", dependencies=[Depends(user_data_etag)])
 def dashboard_data(
     period: str = Query("7d", description="Período para análise (1d, 7d, 30d, 90d)"),
     current_user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
     """Obtém dados completos do dashboard (summary + assets)"""
-    summary = get_dashboard_summary(current_user, period, db)
-    assets = get_assets_performance(current_user, period, db)
-    return {
-        "summary": summary,
-        "asset_performance": assets
-    }
+    return get_dashboard_data(current_user, period, db)
 
-@router.get("/summary", response_model=DashboardSummaryResponse)
+@router.get("/summary", response_model=DashboardSummaryResponse, dependencies=[Depends(user_data_etag)])
 def dashboard_summary(
     period: str = Query("7d", description="Período para análise (1d, 7d, 30d, 90d)"),
     current_user: User = Depends(get_current_user), 
@@ -42,39 +54,99 @@ def dashboard_summary(
     summary = get_dashboard_summary(current_user, period, db)
     return DashboardSummaryResponse(**summary)
 
-@router.get("/assets", response_model=List[WebhookPnlSummaryResponse])
+@router.get("/assets", response_model=List[WebhookPnlSummaryResponse], dependencies=[Depends(user_data_etag)])
 def assets_performance(
+    response: Response,
     period: str = Query("7d", description="Período para análise (1d, 7d, 30d, 90d)"),
     current_user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
     """Obtém performance por ativo"""
-    return get_assets_performance(current_user, period, db)
+    return fast_json_response(get_assets_performance(current_user, period, db), response)
+
+@router.get("/equity-curve", dependencies=[Depends(user_data_etag)])
+def equity_curve(
+    bucket: str = Query("day", pattern="^(hour|day|week)$", description="Agrupamento da série (hour, day, week)"),
+    points: int = Query(200, ge=2, le=2000, description="Número máximo de pontos retornados"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Obtém a curva de PNL acumulado ao longo do tempo"""
+    return get_equity_curve(current_user, bucket, points, start_date, end_date, db)
 
-@router.get("/assets/{trading_view_symbol}")
+@router.get("/assets/{trading_view_symbol}", dependencies=[Depends(user_data_etag)])
 def asset_detailed_performance(
     trading_view_symbol: str,
-    period: str = Query("7d", description="Período para análise (1d, 7d, 30d, 90d)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Obtém resumo e posição atual de um ativo (trades e histórico em sub-recursos paginados)"""
+    return get_asset_detailed_performance(current_user, trading_view_symbol, db)
+
+@router.get("/assets/{trading_view_symbol}/trades", dependencies=[Depends(user_data_etag)])
+def asset_trades(
+    trading_view_symbol: str,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    limit: int = Query(50, ge=1, le=500, description="Itens por página"),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    format: str = Query("rows", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Obtém performance detalhada de um ativo específico"""
-    return get_asset_detailed_performance(current_user, trading_view_symbol, period, start_date, end_date, db)
+    """Obtém trades paginados de um ativo específico"""
+    return fast_json_response(
+        get_asset_trades(current_user, trading_view_symbol, cursor, limit, start_date, end_date, format, db), response
+    )
 
-@router.get("/assets/{trading_view_symbol}/webhooks")
+@router.get("/assets/{trading_view_symbol}/positions", dependencies=[Depends(user_data_etag)])
+def asset_positions_history(
+    trading_view_symbol: str,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    limit: int = Query(50, ge=1, le=500, description="Itens por página"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: str = Query("rows", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Obtém histórico de posições paginado de um ativo específico"""
+    return fast_json_response(
+        get_asset_positions_history(current_user, trading_view_symbol, cursor, limit, start_date, end_date, format, db),
+        response
+    )
+
+@router.get("/assets/{trading_view_symbol}/price-history")
+def asset_price_history(
+    trading_view_symbol: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    points: int = Query(500, ge=2, le=5000, description="Número máximo de pontos retornados"),
+    interval: Optional[str] = Query(None, pattern="^(1m|5m|15m|1h|4h|1d)$", description="Intervalo dos candles (automático se omitido)"),
+    format: str = Query("rows", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Obtém histórico de preços (candles OHLCV) de um ativo específico"""
+    return get_asset_price_history(current_user, trading_view_symbol, start_date, end_date, points, interval, format, db)
+
+@router.get("/assets/{trading_view_symbol}/webhooks", dependencies=[Depends(user_data_etag)])
 def asset_webhook_executions(
     trading_view_symbol: str,
-    page: int = Query(1, ge=1, description="Número da página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em pagination.next_cursor"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    include_total: bool = Query(False, description="Incluir contagem total (limitada)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Obtém execuções de webhooks paginadas para um ativo específico"""
-    return get_asset_webhook_executions(current_user, trading_view_symbol, page, limit, db)
+    return get_asset_webhook_executions(current_user, trading_view_symbol, cursor, limit, include_total, db)
 
-@router.get("/webhooks/{webhook_id}")
+@router.get("/webhooks/{webhook_id}", dependencies=[Depends(user_data_etag)])
 def webhook_execution_details(
     webhook_id: int,
     current_user: User = Depends(get_current_user),
@@ -92,26 +164,31 @@ def pnl_by_period(
     """Obtém PNL por período específico"""
     return get_pnl_by_period(current_user, period_request, db)
 
-@router.get("/trades", response_model=List[WebhookTradeResponse])
+@router.get("/trades", response_model=List[WebhookTradeResponse], dependencies=[Depends(user_data_etag)])
 def user_trades(
-    limit: int = 50,
-    offset: int = 0,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado no header X-Next-Cursor"),
     trading_view_symbol: Optional[str] = None,
+    include_total: bool = Query(False, description="Incluir contagem total (limitada) no header X-Total-Count"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Obtém histórico de trades do usuário"""
-    return get_user_trades(current_user, limit, offset, trading_view_symbol, db)
+    page = get_user_trades(current_user, limit, cursor, trading_view_symbol, include_total, db)
+    set_pagination_headers(response, page["next_cursor"], page["total"], page["total_is_estimate"])
+    return fast_json_response(page["items"], response)
 
-@router.get("/positions", response_model=List[WebhookPositionResponse])
+@router.get("/positions", response_model=List[WebhookPositionResponse], dependencies=[Depends(user_data_etag)])
 def user_positions(
+    response: Response,
     only_open: bool = True,
     trading_view_symbol: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Obtém posições do usuário do banco de dados"""
-    return get_user_positions(current_user, only_open, trading_view_symbol, db)
+    return fast_json_response(get_user_positions(current_user, only_open, trading_view_symbol, db), response)
 
 @router.get("/positions/live")
 def live_positions(
@@ -170,6 +247,11 @@ def live_positions(
         "total_unrealized_pnl": sum(pos["unrealized_pnl"] for pos in positions)
     }
 
+@router.get("/positions/book")
+def position_book_positions(current_user: User = Depends(get_current_user)):
+    """Posições abertas com PnL não realizado e distância de liquidação atualizados a cada tick"""
+    return get_position_book(current_user)
+
 @router.post("/update-prices")
 def update_prices(
     current_user: User = Depends(get_current_user),
@@ -186,7 +268,7 @@ def account_snapshot(
     """Cria um snapshot da conta"""
     return create_account_snapshot(current_user, db)
 
-@router.get("/snapshots", response_model=List[AccountSnapshotResponse])
+@router.get("/snapshots", response_model=List[AccountSnapshotResponse], dependencies=[Depends(user_data_etag)])
 def account_snapshots(
     limit: int = Query(10, ge=1, le=100, description="Número de snapshots a retornar"),
     current_user: User = Depends(get_current_user),
@@ -195,6 +277,26 @@ def account_snapshots(
     """Obtém histórico de snapshots da conta"""
     return get_account_snapshots(current_user, limit, db)
 
+@router.post("/stream/ticket")
+def dashboard_stream_ticket(current_user: User = Depends(get_current_user)):
+    """Ticket de curta duração para abrir o stream sem colocar o JWT de login na URL"""
+    return issue_stream_ticket(current_user)
+
+@router.get("/stream")
+async def dashboard_stream(
+    request: Request,
+    ticket: Optional[str] = Query(None, description="Ticket de POST /stream/ticket (clientes EventSource)"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer)
+):
+    """Stream (SSE) de eventos do usuário: trades, posições, PNL não realizado e logs de webhook"""
+    token = credentials.credentials if credentials else None
+    user_id = await run_in_threadpool(get_stream_user_id, token, ticket)
+    return StreamingResponse(
+        dashboard_event_stream(user_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/recalculate-pnl")
 def recalculate_pnl(
     current_user: User = Depends(get_current_user),
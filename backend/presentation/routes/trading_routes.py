@@ -1,14 +1,24 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
 from domain.models import User
 from application.use_cases.trading_use_cases import get_meta_info, debug_asset_rules, list_all_assets, get_hyperliquid_assets
 from infrastructure.security import get_current_user
+from infrastructure.http_cache import build_etag, check_conditional_get
+from config import META_RESPONSE_TTL_SECONDS
+from infrastructure.external.rate_limiter import low_api_priority
 
-router = APIRouter(prefix="/api", tags=["trading"])
+router = APIRouter(prefix="/api", tags=["trading"], dependencies=[Depends(low_api_priority)])
 
 @router.get("/meta")
-def get_meta():
-    """Obtém informações de metadados da Hyperliquid"""
-    return get_meta_info()
+def get_meta(request: Request, response: Response):
+    """Universo de ativos com mark price, funding e open interest (cache curto + ETag)"""
+    meta = get_meta_info()
+    check_conditional_get(
+        request, response, meta["etag"], datetime.fromtimestamp(meta["generated_at"], timezone.utc),
+        cache_control=f"public, max-age={int(META_RESPONSE_TTL_SECONDS)}"
+    )
+    return meta["payload"]
 
 @router.get("/debug/asset/{trading_view_symbol}")
 def debug_asset(trading_view_symbol: str, current_user: User = Depends(get_current_user)):
@@ -16,11 +26,20 @@ def debug_asset(trading_view_symbol: str, current_user: User = Depends(get_curre
     return debug_asset_rules(trading_view_symbol)
 
 @router.get("/debug/assets")
-def list_assets(current_user: User = Depends(get_current_user)):
-    """Lista todos os ativos disponíveis com suas regras de tamanho"""
-    return list_all_assets()
+def list_assets(
+    search: Optional[str] = Query(None, description="Filtra pelo nome do ativo (contém, sem diferenciar maiúsculas)"),
+    include_delisted: bool = Query(True, description="Inclui ativos deslistados"),
+    offset: int = Query(0, ge=0, description="Itens a pular"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Itens por página (todos se omitido)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Lista os ativos disponíveis com suas regras de tamanho"""
+    return list_all_assets(search, include_delisted, offset, limit)
 
 @router.get("/hyperliquid/assets")
-def get_assets(current_user: User = Depends(get_current_user)):
-    """Busca lista de ativos da Hyperliquid com cache de 24h"""
-    return {"assets": get_hyperliquid_assets()}
+def get_assets(request: Request, response: Response, current_user: User = Depends(get_current_user)):
+    """Busca lista de ativos da Hyperliquid (cache compartilhado de 24h)"""
+    assets = get_hyperliquid_assets()
+    # ETag derivado do conteúdo do cache: muda só quando a lista de ativos muda
+    check_conditional_get(request, response, build_etag(*assets))
+    return {"assets": assets}
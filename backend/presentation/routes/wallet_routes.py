@@ -5,8 +5,9 @@ from domain.schemas import WalletCreate
 from application.use_cases.wallet_use_cases import get_user_wallet, create_or_update_wallet, get_user_positions
 from infrastructure.security import get_current_user
 from infrastructure.database import get_db
+from infrastructure.external.rate_limiter import low_api_priority
 
-router = APIRouter(prefix="/api", tags=["wallet"])
+router = APIRouter(prefix="/api", tags=["wallet"], dependencies=[Depends(low_api_priority)])
 
 @router.get("/wallet")
 def get_wallet(current_user: User = Depends(get_current_user)):
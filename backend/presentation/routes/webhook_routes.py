@@ -1,5 +1,5 @@
-from typing import List
-from fastapi import APIRouter, Depends, Request
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 from domain.models import User
 from domain.schemas import WebhookCreate, WebhookResponse, WebhookLogResponse, GenericWebhookPayload
@@ -10,11 +10,14 @@ from application.use_cases.webhook_use_cases import (
 from application.use_cases.webhook_trading_use_cases import process_generic_webhook
 from infrastructure.security import get_current_user
 from infrastructure.database import get_db
+from infrastructure.pagination import set_pagination_headers
+from infrastructure.http_cache import user_data_etag
+from infrastructure.fast_json import fast_json_response
 
 router = APIRouter(tags=["webhooks"])
 
 # Rotas de configuração de webhooks
-@router.get("/api/webhooks", response_model=List[WebhookResponse])
+@router.get("/api/webhooks", response_model=List[WebhookResponse], dependencies=[Depends(user_data_etag)])
 def get_webhooks(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Retorna todos os webhooks configurados pelo usuário"""
     return get_user_webhooks(current_user, db)
@@ -30,14 +33,31 @@ def remove_webhook(webhook_id: int, current_user: User = Depends(get_current_use
     return delete_webhook(current_user, webhook_id, db)
 
 @router.get("/api/webhooks/{webhook_id}/logs", response_model=List[WebhookLogResponse])
-def get_webhook_log_history(webhook_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_webhook_log_history(
+    webhook_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado no header X-Next-Cursor"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Retorna o histórico de logs de um webhook específico"""
-    return get_webhook_logs(current_user, webhook_id, db)
+    page = get_webhook_logs(current_user, webhook_id, db, limit, cursor)
+    set_pagination_headers(response, page["next_cursor"])
+    return fast_json_response(page["items"], response)
 
 @router.get("/api/webhooks/logs", response_model=List[WebhookLogResponse])
-def get_all_webhook_log_history(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_all_webhook_log_history(
+    response: Response,
+    limit: int = Query(100, ge=1, le=200, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado no header X-Next-Cursor"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Retorna o histórico de logs de todos os webhooks do usuário"""
-    return get_all_webhook_logs(current_user, db)
+    page = get_all_webhook_logs(current_user, db, limit, cursor)
+    set_pagination_headers(response, page["next_cursor"])
+    return fast_json_response(page["items"], response)
 
 # Rota de execução de webhook
 @router.post("/v1/webhook")
@@ -111,9 +111,12 @@ const DashboardPage = ({ token }) => {
   const fetchAssetDetails = async (assetName) => {
     try {
       console.log('Fetching asset details for:', assetName);
-      const data = await api.get(`/api/dashboard/assets/${assetName}`);
+      const [data, tradesPage] = await Promise.all([
+        api.get(`/api/dashboard/assets/${assetName}`),
+        api.get(`/api/dashboard/assets/${assetName}/trades?limit=100`)
+      ]);
       console.log('Asset details received:', data);
-      setSelectedAsset(data);
+      setSelectedAsset({ ...data, trades: tradesPage.trades, trades_next_cursor: tradesPage.next_cursor });
     } catch (error) {
       console.error("Erro ao carregar detalhes do ativo:", error);
       // Mostrar uma mensagem de erro para o usuário
@@ -134,6 +137,25 @@ const DashboardPage = ({ token }) => {
     fetchDashboardData();
   }, [fetchDashboardData]);
 
+  // Recarrega o resumo quando o servidor avisa que algo mudou (em vez de polling)
+  useEffect(() => {
+    let refreshTimer = null;
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(fetchDashboardData, 500);
+    };
+    const unsubscribe = api.subscribe('/api/dashboard/stream', {
+      trade: scheduleRefresh,
+      position: scheduleRefresh,
+      pnl: scheduleRefresh,
+      resync: scheduleRefresh
+    });
+    return () => {
+      clearTimeout(refreshTimer);
+      unsubscribe();
+    };
+  }, [fetchDashboardData]);
+
 
 
   if (isLoading) return <div className="flex justify-center"><Spinner /></div>;
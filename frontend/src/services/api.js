@@ -33,6 +33,44 @@ const api = {
     get(endpoint) { return this.request(endpoint, { method: 'GET' }); },
     post(endpoint, body) { return this.request(endpoint, { method: 'POST', body: JSON.stringify(body) }); },
     delete(endpoint) { return this.request(endpoint, { method: 'DELETE' }); },
+
+    // Stream SSE: EventSource não envia headers, então a URL leva um ticket de curta
+    // duração (POST /stream/ticket) em vez do JWT de login. Ticket expirado numa
+    // reconexão fecha o EventSource: pede um ticket novo e reabre.
+    subscribe(endpoint, handlers) {
+        let source = null;
+        let retryTimer = null;
+        let closed = false;
+
+        const open = async () => {
+            try {
+                const { ticket } = await this.post(`${endpoint}/ticket`);
+                if (closed) return;
+                source = new EventSource(`${API_BASE_URL}${endpoint}?ticket=${encodeURIComponent(ticket)}`);
+                Object.entries(handlers).forEach(([eventType, handler]) => {
+                    source.addEventListener(eventType, (event) => handler(JSON.parse(event.data)));
+                });
+                source.onerror = () => {
+                    if (source.readyState === EventSource.CLOSED) reconnect();
+                };
+            } catch (error) {
+                reconnect();
+            }
+        };
+        const reconnect = () => {
+            if (closed) return;
+            if (source) source.close();
+            clearTimeout(retryTimer);
+            retryTimer = setTimeout(open, 5000);
+        };
+
+        open();
+        return () => {
+            closed = true;
+            clearTimeout(retryTimer);
+            if (source) source.close();
+        };
+    },
     
     async getMeta() {
         const cached = cacheManager.get('hyperliquid_meta');